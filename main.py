@@ -1,28 +1,37 @@
-import json
+from __future__ import annotations
+
+import re
 import logging
+import queue
 import asyncio
+import atexit
+import gzip
 import os
 import random
 import sqlite3
 import hashlib
-import signal
 import sys
 import traceback
 import uuid
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Union
+from datetime import datetime
+from typing import Annotated, Dict, List, Optional, Any, Union
 from dataclasses import dataclass, asdict
 from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 from telegram import Bot, Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, CallbackQueryHandler
-from telegram.error import NetworkError, TimedOut, RetryAfter, BadRequest, TelegramError
-from flask import Flask, request, jsonify
+from telegram.ext import AIORateLimiter, Application, CommandHandler, MessageHandler, filters, ContextTypes, CallbackQueryHandler
+from telegram.constants import ParseMode
+from telegram.error import NetworkError, TimedOut, BadRequest, TelegramError
+from quart import Quart, request, jsonify
+from quart.json.provider import DefaultJSONProvider
+import orjson
+import msgspec
 import threading
-import requests
 import time
 from functools import wraps
 import weakref
-from collections import defaultdict, deque
+from collections import deque, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # --- Enhanced Configuration Management ---
 @dataclass
@@ -39,13 +48,19 @@ class BotConfig:
     max_concurrent_requests: int = 10
     memory_cleanup_interval: int = 300  # 5 minutes
     user_data_retention_hours: int = 24
+    user_state_timeout_seconds: int = 3600  # 1 hour
+    max_tracked_users: int = 10000  # Cap on in-process user state entries
+    max_pending_updates: int = 1000  # Webhook answers 503 past this backlog
     
     # Rate limiting
     max_requests_per_minute: int = 60
     max_requests_per_hour: int = 1000
+    global_send_rate: int = 25  # Telegram API calls per second, all chats
+    chat_send_rate: int = 20    # Messages per minute to one group chat
     
     # Database settings
     db_path: str = "bot_data.db"
+    redis_url: Optional[str] = None  # Shared user state store; in-process when unset
     backup_interval_hours: int = 6
     
     # Health monitoring
@@ -68,19 +83,19 @@ class UserSession:
     user_id: int
     username: str
     first_name: str
-    last_seen: datetime
+    last_seen_ts: float  # time.time(); converted to datetime only for the database
     quiz_preferences: Dict[str, Any]
     current_state: str
     request_count: int = 0
-    last_request_time: datetime = None
+    last_request_ts: float = None
     is_blocked: bool = False
     session_id: str = None
     
     def __post_init__(self):
         if self.session_id is None:
             self.session_id = str(uuid.uuid4())
-        if self.last_request_time is None:
-            self.last_request_time = datetime.now()
+        if self.last_request_ts is None:
+            self.last_request_ts = self.last_seen_ts
 
 @dataclass
 class SystemMetrics:
@@ -94,40 +109,148 @@ class SystemMetrics:
     last_error_time: Optional[datetime]
     webhook_status: str
     db_size_mb: float
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow dict of the fields with last_error_time as an ISO string"""
+        data = self.__dict__.copy()
+        if self.last_error_time is not None:
+            data['last_error_time'] = self.last_error_time.isoformat()
+        return data
+
+@dataclass(slots=True)
+class UserContext:
+    """Per-user conversation state"""
+    is_anonymous: bool = True
+    state: Optional[str] = None
+    last_activity: float = 0.0
+
+class UserStateStore:
+    """In-process user state, ordered by last activity (oldest first) for O(1) eviction"""
+    def __init__(self, timeout_seconds: int, max_users: int):
+        self.timeout_seconds = timeout_seconds
+        self.max_users = max_users
+        self.users: OrderedDict[int, UserContext] = OrderedDict()
+
+    async def load(self, user_id: int) -> UserContext:
+        user = self.users.get(user_id)
+        if user is None:
+            user = self.users[user_id] = UserContext()
+        else:
+            self.users.move_to_end(user_id)
+        user.last_activity = time.monotonic()
+        self.cleanup_old_data()
+        return user
+
+    async def save(self, user_id: int, user: UserContext):
+        # load() hands out the stored object itself, so changes are already kept
+        pass
+
+    def cleanup_old_data(self):
+        """Drop conversation state of idle users, oldest first, and hold the size cap"""
+        cutoff = time.monotonic() - self.timeout_seconds
+        while self.users and next(iter(self.users.values())).last_activity < cutoff:
+            self.users.popitem(last=False)
+        while len(self.users) > self.max_users:
+            self.users.popitem(last=False)
+
+    async def count(self) -> int:
+        return len(self.users)
+
+    async def close(self):
+        pass
+
+class RedisUserStateStore:
+    """User state shared between workers as Redis hashes with a sliding TTL
+
+    A sorted set of user ids scored by last activity backs count(), so it
+    never has to scan the keyspace.
+    """
+    ACTIVE_KEY = "s:active"
+    # Read the hash, refresh its TTL and mark the user active in a single round trip
+    LOAD_SCRIPT = ("local v = redis.call('HGETALL', KEYS[1]) redis.call('EXPIRE', KEYS[1], ARGV[1]) "
+                   "redis.call('ZADD', KEYS[2], ARGV[2], ARGV[3]) return v")
+
+    def __init__(self, url: str, timeout_seconds: int):
+        import redis.asyncio as aioredis  # Only paid for when REDIS_URL is configured
+        self.timeout_seconds = timeout_seconds
+        self.redis = aioredis.Redis.from_url(url, max_connections=32, decode_responses=True)
+        self._load = self.redis.register_script(self.LOAD_SCRIPT)
+
+    async def load(self, user_id: int) -> UserContext:
+        fields = await self._load(keys=[f"s:{user_id}", self.ACTIVE_KEY],
+                                  args=[self.timeout_seconds, time.time(), user_id])
+        data = dict(zip(fields[::2], fields[1::2]))
+        return UserContext(
+            is_anonymous=data.get("anonymous", "1") == "1",
+            state=data.get("state") or None,
+            last_activity=time.monotonic()
+        )
 
-class RateLimiter:
-    """Advanced rate limiting system"""
-    def __init__(self, max_requests: int, time_window: int):
-        self.max_requests = max_requests
-        self.time_window = time_window
-        self.requests = defaultdict(deque)
-        self.blocked_users = {}
+    async def save(self, user_id: int, user: UserContext):
+        key = f"s:{user_id}"
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping={"anonymous": int(user.is_anonymous), "state": user.state or ""})
+            pipe.expire(key, self.timeout_seconds)
+            await pipe.execute()
+
+    async def count(self) -> int:
+        # Drop users whose state has expired, then count the rest
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(self.ACTIVE_KEY, "-inf", time.time() - self.timeout_seconds)
+            pipe.zcard(self.ACTIVE_KEY)
+            _, active = await pipe.execute()
+        return active
+
+    async def close(self):
+        await self.redis.aclose()
+
+class DualRateLimiter:
+    """Per-minute and per-hour token buckets checked together with a single lookup"""
+    def __init__(self, per_minute: int, per_hour: int):
+        self.minute_capacity = float(per_minute)
+        self.hour_capacity = float(per_hour)
+        self.minute_rate = per_minute / 60
+        self.hour_rate = per_hour / 3600
+        # user_id -> (minute_tokens, hour_tokens, last_refill)
+        self._state: Dict[int, tuple] = {}
         
     def is_allowed(self, user_id: int) -> bool:
-        now = time.time()
-        user_requests = self.requests[user_id]
-        
-        # Remove old requests outside time window
-        while user_requests and user_requests[0] < now - self.time_window:
-            user_requests.popleft()
-        
-        # Check if user is temporarily blocked
-        if user_id in self.blocked_users:
-            if now < self.blocked_users[user_id]:
-                return False
-            else:
-                del self.blocked_users[user_id]
-        
-        # Check rate limit
-        if len(user_requests) >= self.max_requests:
-            # Block user for 5 minutes
-            self.blocked_users[user_id] = now + 300
+        now = time.monotonic()
+        state = self._state.get(user_id)
+        if state is None:
+            minute_tokens, hour_tokens = self.minute_capacity, self.hour_capacity
+        else:
+            minute_tokens, hour_tokens, last = state
+            elapsed = now - last
+            minute_tokens = min(self.minute_capacity, minute_tokens + elapsed * self.minute_rate)
+            hour_tokens = min(self.hour_capacity, hour_tokens + elapsed * self.hour_rate)
+        if minute_tokens < 1 or hour_tokens < 1:
+            self._state[user_id] = (minute_tokens, hour_tokens, now)
             return False
-        
-        user_requests.append(now)
+        self._state[user_id] = (minute_tokens - 1, hour_tokens - 1, now)
         return True
+    
+    def prune(self):
+        """Forget users whose buckets have both refilled completely"""
+        now = time.monotonic()
+        for user_id, (minute_tokens, hour_tokens, last) in list(self._state.items()):
+            elapsed = now - last
+            if (minute_tokens + elapsed * self.minute_rate >= self.minute_capacity and
+                    hour_tokens + elapsed * self.hour_rate >= self.hour_capacity):
+                self._state.pop(user_id, None)
 
 # --- Enhanced logging system ---
+class BufferedStreamHandler(logging.StreamHandler):
+    """StreamHandler that only flushes on ERROR and above; lower levels coalesce in the buffer"""
+    def emit(self, record):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
+        if record.levelno >= logging.ERROR:
+            self.flush()
+
 class StructuredLogger:
     """Enhanced structured logging with rotation"""
     def __init__(self):
@@ -138,14 +261,28 @@ class StructuredLogger:
         """Setup enhanced logging configuration"""
         log_format = '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
         
-        # Console handler
-        console_handler = logging.StreamHandler()
+        # Console handler, fed from a queue so request handling never blocks on stderr.
+        # It writes to a block-buffered duplicate of stderr so lines are batched into few writes.
+        try:
+            console_stream = open(os.dup(sys.stderr.fileno()), 'w', buffering=8192,
+                                  encoding='utf-8', errors='backslashreplace')
+        except (AttributeError, OSError, ValueError):
+            console_stream = sys.stderr
+        console_handler = BufferedStreamHandler(console_stream)
         console_handler.setLevel(logging.WARNING)
         console_formatter = logging.Formatter(log_format)
         console_handler.setFormatter(console_formatter)
         
-        self.logger.addHandler(console_handler)
-        self.logger.setLevel(logging.INFO)
+        log_queue = queue.SimpleQueue()
+        self.listener = QueueListener(log_queue, console_handler, respect_handler_level=True)
+        self.listener.start()
+        self.console_handler = console_handler
+        self._closed = False
+        atexit.register(self.close)
+        
+        self.logger.addHandler(QueueHandler(log_queue))
+        # Match the console level so filtered records are never created
+        self.logger.setLevel(logging.WARNING)
         
         # Suppress verbose logs
         logging.getLogger('httpx').setLevel(logging.ERROR)
@@ -153,36 +290,82 @@ class StructuredLogger:
         logging.getLogger('telegram').setLevel(logging.ERROR)
         logging.getLogger('urllib3').setLevel(logging.ERROR)
         
+    def flush(self):
+        """Write out any buffered console output"""
+        self.console_handler.flush()
+    
+    def close(self):
+        """Drain queued records and flush the console; safe to call more than once"""
+        if not self._closed:
+            self._closed = True
+            self.listener.stop()
+        self.flush()
+    
     def log_with_context(self, level: str, message: str, **context):
         """Log with additional context"""
+        if not self.logger.isEnabledFor(logging.getLevelName(level.upper())):
+            return
         log_data = {
             'message': message,
             'timestamp': datetime.now().isoformat(),
             **context
         }
-        getattr(self.logger, level)(f"{message} | Context: {json.dumps(log_data)}")
+        getattr(self.logger, level)(f"{message} | Context: {orjson.dumps(log_data).decode()}")
 
 # Initialize enhanced logging
 logger_instance = StructuredLogger()
 logger = logger_instance.logger
 
 # --- Enhanced Database Management ---
+SELECT_USER_SQL = "SELECT * FROM users WHERE user_id = ?"
+UPSERT_USER_SQL = """INSERT OR REPLACE INTO users 
+   (user_id, username, first_name, last_seen, total_quizzes, preferences, session_data)
+   VALUES (?, ?, ?, ?, ?, ?, ?)"""
+DELETE_STALE_USERS_SQL = "DELETE FROM users WHERE last_seen < ?"
+INSERT_METRICS_SQL = """INSERT INTO system_metrics 
+   (timestamp, memory_usage, cpu_usage, active_users, total_requests, error_count)
+   VALUES (?, ?, ?, ?, ?, ?)"""
+SELECT_KV_SQL = "SELECT value FROM kv WHERE k = ?"
+UPSERT_KV_SQL = "INSERT OR REPLACE INTO kv (k, value) VALUES (?, ?)"
+INSERT_QUIZ_SQL = """INSERT INTO quizzes (user_id, quiz_data, success, question_count)
+   VALUES (?, ?, ?, ?)"""
+
+def decode_session_column(value) -> Dict[str, Any]:
+    """Decode a preferences/session_data value: MessagePack BLOB, or JSON text from older rows"""
+    if not value:
+        return {}
+    if isinstance(value, bytes):
+        return msgspec.msgpack.decode(value)
+    return orjson.loads(value)
+
 class DatabaseManager:
     """Advanced database management with connection pooling and backup"""
     def __init__(self, db_path: str):
         self.db_path = db_path
-        self.connection_pool = []
         self.max_connections = 5
+        self.connection_pool = queue.Queue(maxsize=self.max_connections)
         self.init_database()
         
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the per-connection PRAGMAs applied"""
+        # Pooled connections are handed between threads, so no same-thread check.
+        # Autocommit mode; batches open their own transaction. A larger statement cache
+        # keeps the prepared statements below compiled across calls.
+        conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                               isolation_level=None, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA busy_timeout=30000')  # Wait on locks inside SQLite
+        conn.execute('PRAGMA mmap_size=268435456')  # Read pages straight from the OS cache
+        conn.execute('PRAGMA synchronous=NORMAL')  # Better performance
+        conn.execute('PRAGMA cache_size=10000')  # Larger cache
+        conn.execute('PRAGMA temp_store=MEMORY')  # Temp tables in memory
+        return conn
+    
     def init_database(self):
-        """Initialize database with proper schema"""
+        """Initialize database with proper schema and fill the connection pool"""
         try:
-            conn = sqlite3.connect(self.db_path, timeout=30.0)
+            conn = self._connect()
             conn.execute('PRAGMA journal_mode=WAL')  # Better concurrency
-            conn.execute('PRAGMA synchronous=NORMAL')  # Better performance
-            conn.execute('PRAGMA cache_size=10000')  # Larger cache
-            conn.execute('PRAGMA temp_store=MEMORY')  # Temp tables in memory
             
             # Users table
             conn.execute('''
@@ -195,8 +378,8 @@ class DatabaseManager:
                     last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     is_blocked BOOLEAN DEFAULT FALSE,
                     total_quizzes INTEGER DEFAULT 0,
-                    preferences TEXT DEFAULT '{}',
-                    session_data TEXT DEFAULT '{}'
+                    preferences BLOB DEFAULT X'80',
+                    session_data BLOB DEFAULT X'80'
                 )
             ''')
             
@@ -238,71 +421,230 @@ class DatabaseManager:
                 )
             ''')
             
+            # Small key/value table for bookkeeping such as the last backup time
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS kv (
+                    k TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            ''')
+            
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_metrics_ts ON system_metrics(timestamp)')
+            
             conn.commit()
-            conn.close()
+            self.connection_pool.put_nowait(conn)
+            for _ in range(self.max_connections - 1):
+                self.connection_pool.put_nowait(self._connect())
             logger.info("Database initialized successfully")
             
         except Exception as e:
-            logger.error(f"Database initialization failed: {e}")
+            logger.error("Database initialization failed: %s", e)
             raise
     
-    def get_connection(self):
-        """Get database connection with retry logic"""
-        for attempt in range(3):
+    def get_connection(self) -> sqlite3.Connection:
+        """Borrow a pooled connection; pair every call with release_connection()"""
+        try:
+            return self.connection_pool.get(timeout=30.0)
+        except queue.Empty:
+            logger.error("Database connection pool exhausted")
+            raise
+    
+    def release_connection(self, conn: sqlite3.Connection):
+        """Return a borrowed connection to the pool"""
+        self.connection_pool.put_nowait(conn)
+    
+    def reset_connections(self):
+        """Reopen the idle pooled connections without re-running the schema setup"""
+        stale = []
+        while True:
             try:
-                conn = sqlite3.connect(self.db_path, timeout=30.0)
-                conn.row_factory = sqlite3.Row
-                return conn
-            except sqlite3.OperationalError as e:
-                if attempt < 2:
-                    time.sleep(1)
-                    continue
-                logger.error(f"Database connection failed: {e}")
-                raise
+                stale.append(self.connection_pool.get_nowait())
+            except queue.Empty:
+                break
+        for conn in stale:
+            conn.close()
+            self.connection_pool.put_nowait(self._connect())
+        logger.info("Reopened %s database connections", len(stale))
     
-    def execute_query(self, query: str, params: tuple = ()) -> List[Dict]:
-        """Execute query with error handling"""
-        conn = None
+    @staticmethod
+    def _apply_write(conn: sqlite3.Connection, query: str, params, many: bool = False):
+        """Run one write, or a batch of rows in a single transaction"""
         try:
-            conn = self.get_connection()
-            cursor = conn.execute(query, params)
-            
-            if query.strip().upper().startswith('SELECT'):
-                return [dict(row) for row in cursor.fetchall()]
+            if many:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.executemany(query, params)
+                conn.execute('COMMIT')
             else:
-                conn.commit()
-                return []
-                
+                conn.execute(query, params)
         except Exception as e:
-            if conn:
+            if conn.in_transaction:
                 conn.rollback()
-            logger.error(f"Database query failed: {e}")
+            logger.error("Database query failed: %s", e)
+            raise
+    
+    def _select(self, query: str, params: tuple = ()) -> List[Dict]:
+        conn = self.get_connection()
+        try:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+        except Exception as e:
+            logger.error("Database query failed: %s", e)
             raise
         finally:
-            if conn:
-                conn.close()
+            self.release_connection(conn)
+    
+    def _write(self, query: str, params=(), many: bool = False):
+        conn = self.get_connection()
+        try:
+            self._apply_write(conn, query, params, many)
+        finally:
+            self.release_connection(conn)
+    
+    def execute_query(self, query: str, params: tuple = ()) -> List[Dict]:
+        """Execute an ad hoc query with error handling"""
+        if query.strip().upper().startswith('SELECT'):
+            return self._select(query, params)
+        self._write(query, params)
+        return []
+    
+    def get_user(self, user_id: int) -> Optional[Dict]:
+        rows = self._select(SELECT_USER_SQL, (user_id,))
+        return rows[0] if rows else None
+    
+    def upsert_user(self, user_id: int, username: str, first_name: str, last_seen: str,
+                    total_quizzes: int, preferences: bytes, session_data: bytes):
+        self._write(UPSERT_USER_SQL, (user_id, username, first_name, last_seen,
+                                      total_quizzes, preferences, session_data))
+    
+    def delete_stale_users(self, cutoff: str):
+        self._write(DELETE_STALE_USERS_SQL, (cutoff,))
+    
+    def get_value(self, key: str) -> Optional[str]:
+        rows = self._select(SELECT_KV_SQL, (key,))
+        return rows[0]['value'] if rows else None
+    
+    def set_value(self, key: str, value: str):
+        self._write(UPSERT_KV_SQL, (key, value))
+    
+    def insert_metrics(self, rows: List[tuple]):
+        """Insert (timestamp, memory, cpu, active_users, total_requests, error_count) rows"""
+        self._write(INSERT_METRICS_SQL, rows, many=True)
     
     def backup_database(self) -> bool:
         """Create database backup"""
         try:
             backup_path = f"{self.db_path}.backup.{int(time.time())}"
-            source_conn = self.get_connection()
             backup_conn = sqlite3.connect(backup_path)
+            source_conn = self.get_connection()
+            try:
+                source_conn.backup(backup_conn)
+            finally:
+                self.release_connection(source_conn)
+                backup_conn.close()
             
-            source_conn.backup(backup_conn)
-            source_conn.close()
-            backup_conn.close()
-            
-            logger.info(f"Database backup created: {backup_path}")
+            logger.info("Database backup created: %s", backup_path)
             return True
             
         except Exception as e:
-            logger.error(f"Database backup failed: {e}")
+            logger.error("Database backup failed: %s", e)
             return False
 
+class AsyncDatabaseManager(DatabaseManager):
+    """DatabaseManager with a single writer thread and a reader pool for async callers"""
+    def __init__(self, db_path: str, reader_threads: int = 3):
+        super().__init__(db_path)
+        self._write_queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        # Bumped by reset_connections(); writer and readers reopen when it changes
+        self._generation = 0
+        self._writer_thread = threading.Thread(target=self._writer_loop, name="db-writer", daemon=True)
+        self._writer_thread.start()
+        self._reader_local = threading.local()
+        self._reader_executor = ThreadPoolExecutor(max_workers=reader_threads, thread_name_prefix="db-reader")
+    
+    def _writer_loop(self):
+        """Apply queued writes one at a time on a dedicated connection"""
+        conn = self._connect()
+        generation = self._generation
+        while True:
+            job = self._write_queue.get()
+            if job is None:
+                break
+            if generation != self._generation:
+                conn.close()
+                conn = self._connect()
+                generation = self._generation
+            query, params, future, many = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                self._apply_write(conn, query, params, many)
+                future.set_result([])
+            except Exception as e:
+                future.set_exception(e)
+        conn.close()
+    
+    def _submit_write(self, query: str, params, many: bool = False) -> Future:
+        future = Future()
+        self._write_queue.put((query, params, future, many))
+        return future
+    
+    def _reader_connection(self) -> sqlite3.Connection:
+        """This reader thread's own read-only connection"""
+        local = self._reader_local
+        conn = getattr(local, "conn", None)
+        if conn is None or local.generation != self._generation:
+            if conn is not None:
+                conn.close()
+            conn = self._connect()
+            conn.execute('PRAGMA query_only=1')
+            local.conn = conn
+            local.generation = self._generation
+        return conn
+    
+    def _read(self, query: str, params: tuple) -> List[Dict]:
+        """Run a SELECT on a reader thread"""
+        return [dict(row) for row in self._reader_connection().execute(query, params).fetchall()]
+    
+    def _read_scalar(self, query: str, params: tuple) -> Any:
+        row = self._reader_connection().execute(query, params).fetchone()
+        return row[0] if row else None
+    
+    def reset_connections(self):
+        super().reset_connections()
+        self._generation += 1
+    
+    def _write(self, query: str, params=(), many: bool = False):
+        """Blocking writes from the maintenance thread still go through the writer"""
+        self._submit_write(query, params, many).result()
+    
+    async def fetch(self, query: str, params: tuple = ()) -> List[Dict]:
+        """Run a SELECT on the reader pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._reader_executor, self._read, query, params)
+    
+    async def fetch_scalar(self, query: str, params: tuple = ()) -> Any:
+        """Run a single-value SELECT (e.g. COUNT(*)) on the reader pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._reader_executor, self._read_scalar, query, params)
+    
+    async def execute(self, query: str, params: tuple = ()):
+        """Queue an INSERT/UPDATE/DELETE for the writer thread and wait for it"""
+        await asyncio.wrap_future(self._submit_write(query, params))
+    
+    async def execute_many(self, query: str, rows: List[tuple]):
+        """Queue a batch of rows for one writer transaction and wait for it"""
+        await asyncio.wrap_future(self._submit_write(query, rows, many=True))
+    
+    def close(self):
+        """Let queued writes finish, then stop the writer and reader threads"""
+        self._write_queue.put(None)
+        self._writer_thread.join()
+        self._reader_executor.shutdown(wait=True)
+
 # --- Enhanced Health Monitoring System ---
 class HealthMonitor:
     """Comprehensive health monitoring and alerting"""
+    HEALTH_STATUSES = ('healthy', 'degraded', 'critical')
+    
     def __init__(self, config: BotConfig):
         self.config = config
         self.start_time = time.time()
@@ -314,21 +656,27 @@ class HealthMonitor:
             'cpu_percent': config.max_cpu_usage_percent,
             'error_rate': 0.1  # 10% error rate
         }
+        
+        # Reuse one process handle and cache its samples briefly
+        try:
+            import psutil
+            self._proc = psutil.Process()
+            self._proc.cpu_percent(interval=None)  # Prime the CPU counter
+        except ImportError:
+            self._proc = None  # Basic metrics only without psutil
+        self._metric_cache = (0, 0)
+        self._metric_cache_ts = 0.0
+        self._metric_cache_ttl = 2.0
     
     def get_system_metrics(self) -> SystemMetrics:
         """Get comprehensive system metrics"""
         try:
-            # Try to import psutil, fallback to basic metrics if not available
-            try:
-                import psutil
-                process = psutil.Process()
-                memory_info = process.memory_info()
-                memory_mb = memory_info.rss / 1024 / 1024
-                cpu_percent = process.cpu_percent()
-            except ImportError:
-                # Fallback to basic metrics without psutil
-                memory_mb = 0  # Unknown without psutil
-                cpu_percent = 0  # Unknown without psutil
+            now = time.monotonic()
+            if self._proc is not None and now - self._metric_cache_ts >= self._metric_cache_ttl:
+                self._metric_cache = (self._proc.memory_info().rss / 1024 / 1024,
+                                      self._proc.cpu_percent(interval=None))
+                self._metric_cache_ts = now
+            memory_mb, cpu_percent = self._metric_cache
             
             return SystemMetrics(
                 uptime_seconds=time.time() - self.start_time,
@@ -342,46 +690,50 @@ class HealthMonitor:
                 db_size_mb=0  # Will be updated
             )
         except Exception as e:
-            logger.error(f"Failed to get system metrics: {e}")
+            logger.error("Failed to get system metrics: %s", e)
             return SystemMetrics(0, 0, 0, 0, 0, 0, None, "error", 0)
     
     def check_health(self) -> Dict[str, Any]:
         """Comprehensive health check"""
         metrics = self.get_system_metrics()
-        health_status = {
-            'status': 'healthy',
-            'metrics': asdict(metrics),
-            'alerts': [],
-            'timestamp': datetime.now().isoformat()
-        }
+        thresholds = self.alert_thresholds
+        error_count = metrics.error_count
+        alerts = []
+        severity = 0  # index into HEALTH_STATUSES
         
         # Check memory usage
-        if metrics.memory_usage_mb > self.alert_thresholds['memory_mb']:
-            health_status['alerts'].append({
+        if metrics.memory_usage_mb > thresholds['memory_mb']:
+            alerts.append({
                 'type': 'memory_high',
                 'message': f"Memory usage {metrics.memory_usage_mb:.1f}MB exceeds threshold",
                 'severity': 'warning'
             })
-            health_status['status'] = 'degraded'
+            severity = 1
         
         # Check CPU usage
-        if metrics.cpu_usage_percent > self.alert_thresholds['cpu_percent']:
-            health_status['alerts'].append({
+        if metrics.cpu_usage_percent > thresholds['cpu_percent']:
+            alerts.append({
                 'type': 'cpu_high',
                 'message': f"CPU usage {metrics.cpu_usage_percent:.1f}% exceeds threshold",
                 'severity': 'warning'
             })
-            health_status['status'] = 'degraded'
+            severity = 1
         
         # Check error rate
-        if self.error_count > 10:  # Simple threshold for now
-            health_status['alerts'].append({
+        if error_count > 10:  # Simple threshold for now
+            alerts.append({
                 'type': 'error_rate_high',
-                'message': f"High error count: {self.error_count}",
+                'message': f"High error count: {error_count}",
                 'severity': 'critical'
             })
-            health_status['status'] = 'critical'
+            severity = 2
         
+        health_status = {
+            'status': self.HEALTH_STATUSES[severity],
+            'metrics': metrics.to_dict(),
+            'alerts': alerts,
+            'timestamp': datetime.now().isoformat()
+        }
         self.metrics_history.append(health_status)
         return health_status
     
@@ -397,8 +749,301 @@ class HealthMonitor:
             context=context or {}
         )
 
-# Flask app for webhook
-app = Flask(__name__)
+# --- Static bot messages ---
+# Messages are written with **bold** and `code` markup and converted to
+# MarkdownV2 once at import time; dynamic values are filled in with %.
+DEFAULT_PARSE_MODE = ParseMode.MARKDOWN_V2
+
+_MARKDOWN_V2_ESCAPE = str.maketrans({c: '\\' + c for c in '\\_*[]()~`>#+-=|{}.!'})
+_MARKDOWN_V2_CODE_ESCAPE = str.maketrans({'\\': '\\\\', '`': '\\`'})
+_MARKUP_TOKEN = re.compile(r'\*\*(.+?)\*\*|`([^`]+)`', re.S)
+
+
+def escape_markdown_v2(text: str) -> str:
+    """Escape text for use in a MarkdownV2 message"""
+    return text.translate(_MARKDOWN_V2_ESCAPE)
+
+
+def to_markdown_v2(text: str) -> str:
+    """Convert **bold** and `code` markup to MarkdownV2, escaping everything else"""
+    parts = []
+    pos = 0
+    for match in _MARKUP_TOKEN.finditer(text):
+        parts.append(escape_markdown_v2(text[pos:match.start()]))
+        bold, code = match.groups()
+        if bold is not None:
+            parts.append('*' + escape_markdown_v2(bold) + '*')
+        else:
+            parts.append('`' + code.translate(_MARKDOWN_V2_CODE_ESCAPE) + '`')
+        pos = match.end()
+    parts.append(escape_markdown_v2(text[pos:]))
+    return ''.join(parts)
+
+
+WELCOME_MESSAGE = to_markdown_v2("""🎯 **Simple Quiz Bot** ⚡
+
+✨ Create MCQ quizzes instantly!
+
+💡 **Rules:**
+• `q` = question, `o` = options, `c` = correct, `e` = explanation  
+• `c` starts from 0 (0=A, 1=B, 2=C, 3=D)
+• 2-4 options allowed per question
+• Keep short to fit Telegram limits
+
+🚀 **Fast • Reliable • Professional** 🎓""")
+
+START_GREETING_MESSAGE = to_markdown_v2("👋 Hello **%s**! 🌟\n\n") + WELCOME_MESSAGE
+
+WELCOME_JSON_TEMPLATE = """{"all_q":[{"q":"Capital of France? 🇫🇷","o":["London","Paris","Berlin","Madrid"],"c":1,"e":"Paris is the capital and largest city of France 🗼"},{"q":"What is 2+2? 🔢","o":["3","4","5","6"],"c":1,"e":"Basic addition: 2+2=4 ✅"}]}"""
+
+QUIZ_TYPE_SELECTION_MESSAGE = to_markdown_v2("""🎭 **Choose Your Quiz Style:**
+
+🔒 **Anonymous Quiz:**
+✅ Can forward to channels and groups
+✅ Voters remain private
+✅ Perfect for public sharing
+
+👤 **Non-Anonymous Quiz:**  
+✅ Shows who answered each question
+✅ Great for tracking participation
+❌ Cannot be forwarded to channels
+
+**Which style do you prefer?** 👇✨""")
+
+HELP_MESSAGE = to_markdown_v2("""🆘 **Quiz Bot Help** 📚
+
+🤖 **Commands:**
+• `/start` ⭐ - Begin quiz creation
+• `/quickstart` ⚡ - Quick 5-step guide
+• `/template` 📋 - Get JSON template
+• `/help` 🆘 - Show this help
+• `/status` 📊 - Check settings
+• `/toggle` 🔄 - Switch quiz types
+
+📚 **JSON Format:**
+• `all_q` 📝 - Questions array
+• `q` ❓ - Question text
+• `o` 📝 - Answer options (2-4 choices)
+• `c` ✅ - Correct answer (0=A, 1=B, 2=C, 3=D)
+• `e` 💡 - Explanation (optional)
+
+💡 **Pro Tip:** Use `/quickstart` for fastest setup! 🚀""")
+
+QUICK_START_MESSAGE = to_markdown_v2("""⚡ **Quick Start Guide:** 🚀
+
+1️⃣ Use `/template` to get 4-option JSON format 📋
+2️⃣ Copy template → Give to AI (ChatGPT) 🤖  
+3️⃣ Ask AI: "Customize with my questions in this format" 💭
+4️⃣ Send customized JSON to me 📤
+5️⃣ Get instant interactive quizzes! 🎯✨
+
+**Need help?** Use `/help` for detailed guide 📚""")
+
+TEMPLATE_HEADER_MESSAGE = to_markdown_v2("📋 **4-Option JSON Template:** 🎯")
+
+TEMPLATE_FOOTER_MESSAGE = to_markdown_v2("💡 **Copy above template → Give to ChatGPT → Ask to customize with your questions!** 🤖✨")
+
+TOGGLE_MESSAGE = to_markdown_v2("⚙️ **Current Setting:** %s 📊\n\n🔄 **Quick Toggle:** Choose your preferred quiz type: 👇✨")
+
+STATUS_MESSAGE = to_markdown_v2(
+    "%s **Bot Status: Active & Ready!** ⚡\n\n"
+    "👤 **User:** %s 🌟\n"
+    "📍 **Chat ID:** `%s` 🔢\n"
+    "🎯 **Quiz Type:** %s 🎭\n"
+    "%s\n"
+    "📊 **Active Users:** %s 👥\n\n"
+    "🚀 **Ready to create amazing quizzes!** ✨"
+)
+
+RESTART_MESSAGE = (to_markdown_v2("🎉 **Ready for another quiz?** ✨\n\n") + WELCOME_MESSAGE
+                   + "\n\n" + QUIZ_TYPE_SELECTION_MESSAGE)
+
+START_PROPERLY_MESSAGE = to_markdown_v2("🔄 **Let's start properly!** ✨")
+
+PROCESSING_MESSAGE = to_markdown_v2("🔄 **Processing your quiz JSON...** ⚡🎯")
+
+NO_QUESTIONS_MESSAGE = to_markdown_v2("❌ **No questions found!** 🔍\n\n🔄 **Let's restart with proper format...** 📋")
+
+INVALID_QUESTIONS_MESSAGE = to_markdown_v2("❌ **Problems found in your questions:** 📝\n\n") + "%s" + to_markdown_v2(
+    "\n\n✏️ **Fix them and send the JSON again** 🔄")
+
+# Per-question problem lines for INVALID_QUESTIONS_MESSAGE
+INVALID_FORMAT_LINE = to_markdown_v2("• Question %s: missing `q`, `o` or `c`")
+INVALID_OPTIONS_LINE = to_markdown_v2("• Question %s: needs 2-4 text options")
+INVALID_CORRECT_LINE = to_markdown_v2("• Question %s: `c` must be an option index (0-3)")
+INVALID_EXPLANATION_LINE = to_markdown_v2("• Question %s: `e` must be text")
+TOO_MANY_QUESTIONS_LINE = to_markdown_v2("• Too many questions: at most %s per quiz")
+MORE_PROBLEMS_LINE = to_markdown_v2("• …and %s more")
+MAX_LISTED_PROBLEMS = 10  # Keeps INVALID_QUESTIONS_MESSAGE well under Telegram's length limit
+INVALID_LENGTH_LINE = to_markdown_v2("• Question %s: too long (max 300 chars for `q`, 100 per option, 200 for `e`)")
+
+VALIDATED_MESSAGE = to_markdown_v2("✅ **%s questions validated!** 🎯\n🚀 Sending %s polls... ⚡")
+
+COMPLETION_MESSAGE = to_markdown_v2("🎯 **%s %s quizzes sent successfully!** ✅🎉")
+
+PARTIAL_SUCCESS_MESSAGE = to_markdown_v2("⚠️ **Partial Success:** %s/%s questions sent 📊\n\n🔄 **Restarting...** 🔄")
+
+INVALID_JSON_MESSAGE = to_markdown_v2("❌ **Invalid JSON Format!** 📋\n\n🔄 **Let's restart with proper format...** ✨")
+
+ERROR_MESSAGE = to_markdown_v2("❌ **Error occurred!** ⚠️\n\n🔄 **Restarting...** 🔄")
+
+
+# Inline keyboards are immutable, so one instance serves every chat
+QUIZ_TYPE_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔒 Anonymous Quiz (Can forward to channels)", callback_data="anonymous_true")],
+    [InlineKeyboardButton("👤 Non-Anonymous Quiz (Shows who voted)", callback_data="anonymous_false")]
+])
+TOGGLE_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔒 Switch to Anonymous", callback_data="anonymous_true")],
+    [InlineKeyboardButton("👤 Switch to Non-Anonymous", callback_data="anonymous_false")]
+])
+
+# Quiz type dependent messages, keyed by is_anonymous
+QUIZ_TYPE_LABELS = {True: "🔒 Anonymous", False: "👤 Non-Anonymous"}
+ESCAPED_QUIZ_TYPE_LABELS = {key: escape_markdown_v2(label) for key, label in QUIZ_TYPE_LABELS.items()}
+
+TOGGLE_MESSAGES = {key: TOGGLE_MESSAGE % label for key, label in ESCAPED_QUIZ_TYPE_LABELS.items()}
+
+# The template goes in a code block so it can be copied with one tap
+TEMPLATE_CODE_BLOCK = "```json\n" + WELCOME_JSON_TEMPLATE.translate(_MARKDOWN_V2_CODE_ESCAPE) + "\n```"
+
+QUIZ_TYPE_SELECTED_MESSAGES = {
+    is_anonymous: to_markdown_v2(f"✅ **{label} Quiz Selected!** 🎉\n\n📋 **JSON Template:**\n")
+    + TEMPLATE_CODE_BLOCK
+    + to_markdown_v2("""
+
+📝 **Next Steps:**
+1️⃣ Copy the JSON template above
+2️⃣ Give it to ChatGPT/AI 🤖
+3️⃣ Ask to customize with your questions in our format
+
+🚀 **Then send me your customized JSON:** 👇⚡""")
+    for is_anonymous, label in QUIZ_TYPE_LABELS.items()
+}
+
+# --- Quiz parsing ---
+# Telegram poll limits
+MAX_QUESTION_LENGTH = 300
+MAX_OPTION_LENGTH = 100
+MAX_EXPLANATION_LENGTH = 200
+
+class TemplateQuestion(msgspec.Struct, gc=False):
+    """One question in the compact format of WELCOME_JSON_TEMPLATE"""
+    q: Annotated[str, msgspec.Meta(min_length=1, max_length=MAX_QUESTION_LENGTH)]
+    o: Annotated[List[Annotated[str, msgspec.Meta(max_length=MAX_OPTION_LENGTH)]],
+                 msgspec.Meta(min_length=2, max_length=4)]
+    c: Annotated[int, msgspec.Meta(ge=0)]
+    e: Annotated[str, msgspec.Meta(max_length=MAX_EXPLANATION_LENGTH)] = ""
+
+class TemplateQuiz(msgspec.Struct, gc=False):
+    all_q: Annotated[List[TemplateQuestion], msgspec.Meta(min_length=1)]
+
+_template_quiz_decoder = msgspec.json.Decoder(TemplateQuiz)
+
+def decode_template_quiz(text: str) -> Optional[List[tuple]]:
+    """Parse and validate a quiz in the template format in one pass
+
+    Returns normalized (question, options, correct_id, explanation) tuples, or
+    None when the text is not a valid template quiz.
+    """
+    try:
+        quiz = _template_quiz_decoder.decode(text)
+    except (msgspec.DecodeError, msgspec.ValidationError):
+        return None
+    if any(question.c >= len(question.o) for question in quiz.all_q):
+        return None
+    return [(question.q, question.o, question.c, question.e or None) for question in quiz.all_q]
+
+def _first(d: Dict, *keys: str, default: Any = None) -> Any:
+    """Value of the first key present in d with a non-None value, else default
+
+    Unlike chaining get() with `or`, present-but-falsy values such as "" or 0
+    are returned rather than skipped.
+    """
+    get = d.get
+    for key in keys:
+        value = get(key)
+        if value is not None:
+            return value
+    return default
+
+def _too_long(value: Any, limit: int) -> bool:
+    return isinstance(value, str) and len(value) > limit
+
+# Top-level keys that may hold the question list, in priority order
+QUESTION_KEYS = ("all_q", "q", "all_questions")
+
+def normalize_questions(questions: List[Dict]) -> tuple:
+    """Validate questions using any accepted key names in a single pass
+
+    Returns (normalized tuples, problems), where problems lists one
+    MarkdownV2 line per invalid question and is empty when all are valid.
+    """
+    normalized = []
+    problems = []
+    for i, question in enumerate(questions, 1):
+        if not isinstance(question, dict):
+            problems.append(INVALID_FORMAT_LINE % i)
+            continue
+        question_text = _first(question, "q", "question")
+        options = _first(question, "o", "options")
+        correct_id = _first(question, "c", "correct", "correct_option_id", default=-1)
+
+        # Same types as TemplateQuestion: string text and options, a plain int (not bool) for c
+        if not question_text or not isinstance(question_text, str) or not options or correct_id == -1:
+            problems.append(INVALID_FORMAT_LINE % i)
+            continue
+        option_count = len(options) if isinstance(options, list) else 0
+        explanation = _first(question, "e", "explanation")
+        if not 2 <= option_count <= 4 or not all(isinstance(option, str) for option in options):
+            problems.append(INVALID_OPTIONS_LINE % i)
+        elif type(correct_id) is not int or not 0 <= correct_id < option_count:
+            problems.append(INVALID_CORRECT_LINE % i)
+        elif explanation is not None and not isinstance(explanation, str):
+            problems.append(INVALID_EXPLANATION_LINE % i)
+        elif (_too_long(question_text, MAX_QUESTION_LENGTH)
+              or any(_too_long(option, MAX_OPTION_LENGTH) for option in options)
+              or _too_long(explanation, MAX_EXPLANATION_LENGTH)):
+            problems.append(INVALID_LENGTH_LINE % i)
+        else:
+            normalized.append((question_text, options, correct_id, explanation or None))
+    return normalized, problems
+
+def format_problems(problems: List[str]) -> str:
+    """Join the first MAX_LISTED_PROBLEMS problem lines, summarizing the rest"""
+    lines = problems[:MAX_LISTED_PROBLEMS]
+    if len(problems) > MAX_LISTED_PROBLEMS:
+        lines.append(MORE_PROBLEMS_LINE % (len(problems) - MAX_LISTED_PROBLEMS))
+    return "\n".join(lines)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson for request parsing and jsonify responses"""
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+class PingMiddleware:
+    """Answers /ping at the ASGI layer so monitor traffic skips Quart's request dispatch"""
+    START = {'type': 'http.response.start', 'status': 200, 'headers': [(b'content-length', b'0')]}
+    BODY = {'type': 'http.response.body', 'body': b''}
+
+    def __init__(self, asgi_app):
+        self.asgi_app = asgi_app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == '/ping' and scope['method'] in ('GET', 'HEAD'):
+            await send(self.START)
+            await send(self.BODY)
+            return
+        await self.asgi_app(scope, receive, send)
+
+# Quart (ASGI) app for webhook
+app = Quart(__name__)
+app.json = OrjsonProvider(app)
+app.asgi_app = PingMiddleware(app.asgi_app)
 
 
 class EnhancedTelegramQuizBot:
@@ -410,15 +1055,23 @@ class EnhancedTelegramQuizBot:
         self.application = None
         
         # Enhanced data management
-        self.db_manager = DatabaseManager(config.db_path)
+        self.db_manager = AsyncDatabaseManager(config.db_path)
         self.health_monitor = HealthMonitor(config)
-        self.rate_limiter = RateLimiter(config.max_requests_per_minute, 60)
-        self.hourly_rate_limiter = RateLimiter(config.max_requests_per_hour, 3600)
+        self._truncate_at = config.max_message_length - 6  # Room for a closing "\n```" and "\n…"
+        self._too_many_questions_message = INVALID_QUESTIONS_MESSAGE % (
+            TOO_MANY_QUESTIONS_LINE % config.max_questions_per_quiz)
+        self.limiter = DualRateLimiter(config.max_requests_per_minute, config.max_requests_per_hour)
         
         # Session management
         self.active_sessions: Dict[int, UserSession] = {}
         self.session_cleanup_counter = 0
         
+        # Conversation state, in Redis when configured so several workers can share it
+        if config.redis_url:
+            self.user_store = RedisUserStateStore(config.redis_url, config.user_state_timeout_seconds)
+        else:
+            self.user_store = UserStateStore(config.user_state_timeout_seconds, config.max_tracked_users)
+        
         # Performance tracking
         self.total_requests = 0
         self.successful_requests = 0
@@ -430,134 +1083,187 @@ class EnhancedTelegramQuizBot:
         self.consecutive_errors = 0
         self.max_consecutive_errors = 5
         
-        # Initialize background tasks
-        self._setup_background_tasks()
+        # system_metrics rows are buffered and written in batches
+        self._metrics_buffer: deque = deque()
+        self._metrics_flush_threshold = 16
+        self._metrics_flush_interval = 1800  # seconds
+        self._last_metrics_flush = time.time()
+        
+        # Last successful backup, kept in memory and persisted in the kv table
+        self._last_backup_ts = float(self.db_manager.get_value('last_backup') or 0)
+        
+        # Completed quizzes are inserted in batches by _quiz_writer_loop
+        self._quiz_save_queue: asyncio.Queue = asyncio.Queue()
+        self._quiz_batch_size = 50
+        self._quiz_batch_wait = 0.5  # seconds
+        
+        # Background maintenance tasks, started on the serving event loop
+        self._background_tasks: List[asyncio.Task] = []
         
         logger.info("Enhanced Telegram Quiz Bot initialized")
 
-    def _setup_background_tasks(self):
-        """Setup background maintenance tasks"""
-        def cleanup_task():
-            while True:
-                try:
-                    time.sleep(self.config.memory_cleanup_interval)
-                    self._cleanup_inactive_sessions()
-                    self._backup_database_if_needed()
-                    self._health_check()
-                except Exception as e:
-                    logger.error(f"Background task error: {e}")
-        
-        cleanup_thread = threading.Thread(target=cleanup_task, daemon=True)
-        cleanup_thread.start()
+    def start_background_tasks(self):
+        """Start the maintenance loops as tasks on the running event loop"""
+        self._background_tasks = [
+            asyncio.create_task(self._cleanup_loop()),
+            asyncio.create_task(self._backup_loop()),
+            asyncio.create_task(self._health_loop()),
+            asyncio.create_task(self._quiz_writer_loop()),
+        ]
         logger.info("Background maintenance tasks started")
     
-    def _cleanup_inactive_sessions(self):
-        """Enhanced session cleanup with database persistence"""
+    async def stop_background_tasks(self):
+        for task in self._background_tasks:
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        self._background_tasks = []
+    
+    # The maintenance steps below are blocking (SQLite, backups), so each tick runs
+    # them in a worker thread; their writes still go through the single DB writer.
+    async def _cleanup_loop(self):
+        while True:
+            await asyncio.sleep(self.config.memory_cleanup_interval)
+            try:
+                await self._cleanup_inactive_sessions()
+            except Exception as e:
+                logger.error("Background task error: %s", e)
+    
+    async def _backup_loop(self):
+        while True:
+            await asyncio.sleep(self.config.memory_cleanup_interval)
+            try:
+                await asyncio.to_thread(self._backup_database_if_needed)
+            except Exception as e:
+                logger.error("Background task error: %s", e)
+    
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.config.health_check_interval)
+            try:
+                if await asyncio.to_thread(self._health_check):
+                    await self._attempt_auto_recovery()
+                if time.time() - self._last_metrics_flush >= self._metrics_flush_interval:
+                    await asyncio.to_thread(self._flush_metrics)
+                logger_instance.flush()
+            except Exception as e:
+                logger.error("Background task error: %s", e)
+    
+    async def _cleanup_inactive_sessions(self):
+        """Enhanced session cleanup with database persistence
+
+        Sessions and rate limiter state are shared with the handlers, so they
+        are pruned on the event loop; only the SQLite work goes to a thread.
+        """
         try:
-            cutoff_time = datetime.now() - timedelta(hours=self.config.user_data_retention_hours)
+            cutoff_ts = time.time() - self.config.user_data_retention_hours * 3600
             
             # Clean up in-memory sessions
-            sessions_to_remove = [
+            expired = [
                 user_id for user_id, session in self.active_sessions.items()
-                if session.last_seen < cutoff_time
+                if session.last_seen_ts < cutoff_ts
             ]
+            sessions_to_remove = [self.active_sessions.pop(user_id) for user_id in expired]
             
-            for user_id in sessions_to_remove:
-                # Save session data to database before cleanup
-                session = self.active_sessions[user_id]
-                self._save_user_session_to_db(session)
-                del self.active_sessions[user_id]
+            self.limiter.prune()
             
-            # Clean up database old records
-            self.db_manager.execute_query(
-                "DELETE FROM users WHERE last_seen < ?",
-                (cutoff_time.isoformat(),)
-            )
+            await asyncio.to_thread(self._persist_session_cleanup, sessions_to_remove, cutoff_ts)
             
             if sessions_to_remove:
-                logger.info(f"Cleaned up {len(sessions_to_remove)} inactive sessions")
+                logger.info("Cleaned up %s inactive sessions", len(sessions_to_remove))
                 
         except Exception as e:
-            logger.error(f"Session cleanup failed: {e}")
+            logger.error("Session cleanup failed: %s", e)
+    
+    def _persist_session_cleanup(self, sessions: List[UserSession], cutoff_ts: float):
+        """Save evicted sessions and delete stale user records"""
+        for session in sessions:
+            self._save_user_session_to_db(session)
+        self.db_manager.delete_stale_users(datetime.fromtimestamp(cutoff_ts).isoformat())
     
     def _backup_database_if_needed(self):
         """Automatic database backup"""
         try:
-            last_backup = self.db_manager.execute_query(
-                "SELECT MAX(timestamp) as last_backup FROM system_metrics WHERE memory_usage > 0"
-            )
-            
-            if not last_backup or not last_backup[0]['last_backup']:
-                self.db_manager.backup_database()
-            else:
-                last_backup_time = datetime.fromisoformat(last_backup[0]['last_backup'])
-                if datetime.now() - last_backup_time > timedelta(hours=self.config.backup_interval_hours):
-                    self.db_manager.backup_database()
+            if time.time() - self._last_backup_ts > self.config.backup_interval_hours * 3600:
+                if self.db_manager.backup_database():
+                    self._last_backup_ts = time.time()
+                    self.db_manager.set_value('last_backup', str(self._last_backup_ts))
                     
         except Exception as e:
-            logger.error(f"Database backup check failed: {e}")
+            logger.error("Database backup check failed: %s", e)
     
-    def _health_check(self):
-        """Periodic health check and auto-recovery"""
+    def _health_check(self) -> bool:
+        """Periodic health check; returns True when auto-recovery is needed"""
         try:
             health_status = self.health_monitor.check_health()
+            critical = health_status['status'] == 'critical'
             
-            if health_status['status'] == 'critical':
+            if critical:
                 logger.error("Critical health issues detected - attempting auto-recovery")
-                self._attempt_auto_recovery()
             
-            # Store metrics in database
+            # Buffer metrics for the next batched write; the timestamp is taken now
+            # in the same UTC format as CURRENT_TIMESTAMP
             metrics = health_status['metrics']
-            self.db_manager.execute_query(
-                """INSERT INTO system_metrics 
-                   (memory_usage, cpu_usage, active_users, total_requests, error_count)
-                   VALUES (?, ?, ?, ?, ?)""",
-                (metrics['memory_usage_mb'], metrics['cpu_usage_percent'], 
+            self._metrics_buffer.append(
+                (time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
+                 metrics['memory_usage_mb'], metrics['cpu_usage_percent'],
                  metrics['active_users'], metrics['total_requests'], metrics['error_count'])
             )
+            if len(self._metrics_buffer) >= self._metrics_flush_threshold:
+                self._flush_metrics()
             
             self.last_health_check = time.time()
+            return critical
             
         except Exception as e:
-            logger.error(f"Health check failed: {e}")
+            logger.error("Health check failed: %s", e)
+            return False
     
-    def _attempt_auto_recovery(self):
+    def _flush_metrics(self):
+        """Write buffered system_metrics rows in one transaction"""
+        self._last_metrics_flush = time.time()
+        rows = [self._metrics_buffer.popleft() for _ in range(len(self._metrics_buffer))]
+        if not rows:
+            return
+        try:
+            self.db_manager.insert_metrics(rows)
+        except Exception as e:
+            logger.error("Failed to write %s metrics rows: %s", len(rows), e)
+    
+    async def _attempt_auto_recovery(self):
         """Automatic recovery from critical issues"""
         try:
             logger.info("Attempting automatic recovery...")
             
             # Clear old sessions to free memory
-            self._cleanup_inactive_sessions()
+            await self._cleanup_inactive_sessions()
             
             # Reset error counters
             self.consecutive_errors = 0
             self.health_monitor.error_count = 0
             
-            # Reinitialize database connection
-            self.db_manager = DatabaseManager(self.config.db_path)
+            # Reopen database connections
+            await asyncio.to_thread(self.db_manager.reset_connections)
             
             logger.info("Auto-recovery completed successfully")
             
         except Exception as e:
-            logger.error(f"Auto-recovery failed: {e}")
+            logger.error("Auto-recovery failed: %s", e)
     
     def _get_or_create_user_session(self, user_id: int, username: str = None, first_name: str = None) -> UserSession:
         """Get or create user session with database persistence"""
+        now = time.time()
         if user_id not in self.active_sessions:
             # Try to load from database
-            db_user = self.db_manager.execute_query(
-                "SELECT * FROM users WHERE user_id = ?", (user_id,)
-            )
+            user_data = self.db_manager.get_user(user_id)
             
-            if db_user:
-                user_data = db_user[0]
+            if user_data:
                 self.active_sessions[user_id] = UserSession(
                     user_id=user_id,
                     username=user_data.get('username', username),
                     first_name=user_data.get('first_name', first_name),
-                    last_seen=datetime.now(),
-                    quiz_preferences=json.loads(user_data.get('preferences', '{}')),
-                    current_state=json.loads(user_data.get('session_data', '{}')).get('state', 'idle'),
+                    last_seen_ts=now,
+                    quiz_preferences=decode_session_column(user_data.get('preferences')),
+                    current_state=decode_session_column(user_data.get('session_data')).get('state', 'idle'),
                     request_count=user_data.get('total_quizzes', 0)
                 )
             else:
@@ -566,7 +1272,7 @@ class EnhancedTelegramQuizBot:
                     user_id=user_id,
                     username=username or "",
                     first_name=first_name or "",
-                    last_seen=datetime.now(),
+                    last_seen_ts=now,
                     quiz_preferences={'anonymous': True},
                     current_state='idle'
                 )
@@ -575,504 +1281,216 @@ class EnhancedTelegramQuizBot:
                 self._save_user_session_to_db(self.active_sessions[user_id])
         
         # Update last seen
-        self.active_sessions[user_id].last_seen = datetime.now()
+        self.active_sessions[user_id].last_seen_ts = now
         return self.active_sessions[user_id]
     
     def _save_user_session_to_db(self, session: UserSession):
-        """Save user session to database"""
-        try:
-            self.db_manager.execute_query(
-                """INSERT OR REPLACE INTO users 
-                   (user_id, username, first_name, last_seen, total_quizzes, preferences, session_data)
-                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (session.user_id, session.username, session.first_name, 
-                 session.last_seen.isoformat(), session.request_count,
-                 json.dumps(session.quiz_preferences),
-                 json.dumps({'state': session.current_state}))
-            )
-        except Exception as e:
-            logger.error(f"Failed to save user session: {e}")
-    
-    def _check_rate_limit(self, user_id: int) -> bool:
-        """Check if user is within rate limits"""
-        return (self.rate_limiter.is_allowed(user_id) and 
-                self.hourly_rate_limiter.is_allowed(user_id))
-
-    async def safe_send_message(self, chat_id: int, text: str, **kwargs) -> Optional[Any]:
-        """Enhanced message sending with comprehensive error handling"""
-        self.total_requests += 1
-        
-        # Validate message length
-        if len(text) > self.config.max_message_length:
-            text = text[:self.config.max_message_length-3] + "..."
-        
-        for attempt in range(self.config.max_retries):
-            try:
-                if not self.application or not self.application.bot:
-                    logger.error("Bot application not available")
-                    return None
-                
-                bot = self.application.bot
-                result = await bot.send_message(chat_id=chat_id, text=text, **kwargs)
-                self.successful_requests += 1
-                return result
-                
-            except (NetworkError, TimedOut) as e:
-                logger.warning(f"Network error on attempt {attempt + 1}: {e}")
-                if attempt < self.config.max_retries - 1:
-                    await asyncio.sleep(self.config.retry_delay * (attempt + 1))
-                    continue
-                else:
-                    self.failed_requests += 1
-                    self.health_monitor.record_error("network_error", str(e))
-                    return None
-                    
-            except RetryAfter as e:
-                logger.warning(f"Rate limited, waiting {e.retry_after} seconds")
-                await asyncio.sleep(min(e.retry_after + 1, 60))
-                continue
-                
-            except BadRequest as e:
-                logger.error(f"Bad request: {e}")
-                self.failed_requests += 1
-                self.health_monitor.record_error("bad_request", str(e))
-                return None
-                
-            except TelegramError as e:
-                logger.error(f"Telegram error: {e}")
-                self.failed_requests += 1
-                self.health_monitor.record_error("telegram_error", str(e))
-                return None
-                
-            except Exception as e:
-                logger.error(f"Unexpected error: {e}")
-                self.failed_requests += 1
-                self.health_monitor.record_error("unexpected_error", str(e))
-                return None
-        
-        return None
-    
-    async def safe_edit_message(self, message: Any, text: str, **kwargs) -> Optional[Any]:
-        """Enhanced message editing with error handling"""
-        if len(text) > self.config.max_message_length:
-            text = text[:self.config.max_message_length-3] + "..."
-        
-        for attempt in range(self.config.max_retries):
-            try:
-                return await message.edit_text(text, **kwargs)
-                
-            except (NetworkError, TimedOut) as e:
-                if attempt < self.config.max_retries - 1:
-                    await asyncio.sleep(self.config.retry_delay * (attempt + 1))
-                    continue
-                else:
-                    logger.error(f"Failed to edit message after {self.config.max_retries} attempts: {e}")
-                    return None
-                    
-            except BadRequest as e:
-                logger.error(f"Bad request when editing message: {e}")
-                return None
-                
-            except Exception as e:
-                logger.error(f"Unexpected error when editing message: {e}")
-                return None
-        
-        return None
-    
-    async def safe_send_poll(self, **poll_params) -> Optional[Any]:
-        """Enhanced poll sending with validation and error handling"""
-        # Validate poll parameters
-        if not poll_params.get('question') or not poll_params.get('options'):
-            logger.error("Invalid poll parameters: missing question or options")
-            return None
-        
-        if len(poll_params['options']) < 2 or len(poll_params['options']) > 10:
-            logger.error(f"Invalid number of poll options: {len(poll_params['options'])}")
-            return None
-        
-        if poll_params.get('correct_option_id', -1) >= len(poll_params['options']):
-            logger.error(f"Invalid correct_option_id: {poll_params.get('correct_option_id')}")
-            return None
-        
-        for attempt in range(self.config.max_retries):
-            try:
-                if not self.application or not self.application.bot:
-                    logger.error("Bot application not available for poll")
-                    return None
-                
-                bot = self.application.bot
-                result = await bot.send_poll(**poll_params)
-                return result
-                
-            except (NetworkError, TimedOut) as e:
-                if attempt < self.config.max_retries - 1:
-                    await asyncio.sleep(self.config.retry_delay * (attempt + 1))
-                    continue
-                else:
-                    logger.error(f"Failed to send poll after {self.config.max_retries} attempts: {e}")
-                    return None
-                    
-            except BadRequest as e:
-                logger.error(f"Bad request when sending poll: {e}")
-                return None
-                
-            except Exception as e:
-                logger.error(f"Unexpected error when sending poll: {e}")
-                return None
-        
-        return None
-    
-    def validate_quiz_data(self, quiz_data: Dict) -> Dict[str, Any]:
-        """Comprehensive quiz data validation"""
-        validation_result = {
-            'is_valid': True,
-            'errors': [],
-            'warnings': [],
-            'questions_count': 0
-        }
-        
-        try:
-            # Check if quiz_data is a dictionary
-            if not isinstance(quiz_data, dict):
-                validation_result['is_valid'] = False
-                validation_result['errors'].append("Quiz data must be a JSON object")
-                return validation_result
-            
-            # Extract questions
-            questions = quiz_data.get("all_q", quiz_data.get("q", quiz_data.get("all_questions", [])))
-            
-            if not isinstance(questions, list):
-                validation_result['is_valid'] = False
-                validation_result['errors'].append("Questions must be provided as an array")
-                return validation_result
-            
-            if not questions:
-                validation_result['is_valid'] = False
-                validation_result['errors'].append("No questions provided")
-                return validation_result
-            
-            if len(questions) > self.config.max_questions_per_quiz:
-                validation_result['is_valid'] = False
-                validation_result['errors'].append(f"Too many questions. Maximum allowed: {self.config.max_questions_per_quiz}")
-                return validation_result
-            
-            # Validate each question
-            for i, question in enumerate(questions):
-                question_errors = self._validate_question(question, i + 1)
-                validation_result['errors'].extend(question_errors)
-            
-            validation_result['questions_count'] = len(questions)
-            validation_result['is_valid'] = len(validation_result['errors']) == 0
-            
-        except Exception as e:
-            validation_result['is_valid'] = False
-            validation_result['errors'].append(f"Validation error: {str(e)}")
-        
-        return validation_result
-    
-    def _validate_question(self, question: Dict, question_num: int) -> List[str]:
-        """Validate individual question"""
-        errors = []
-        
-        # Check question structure
-        if not isinstance(question, dict):
-            errors.append(f"Question {question_num}: Must be an object")
-            return errors
-        
-        # Validate question text
-        question_text = question.get("q") or question.get("question", "")
-        if not question_text or not isinstance(question_text, str):
-            errors.append(f"Question {question_num}: Missing or invalid question text")
-        elif len(question_text) > 300:  # Telegram poll question limit
-            errors.append(f"Question {question_num}: Question text too long (max 300 characters)")
-        
-        # Validate options
-        options = question.get("o") or question.get("options", [])
-        if not isinstance(options, list):
-            errors.append(f"Question {question_num}: Options must be an array")
-            return errors
-        
-        if len(options) < 2:
-            errors.append(f"Question {question_num}: Must have at least 2 options")
-        elif len(options) > 10:
-            errors.append(f"Question {question_num}: Cannot have more than 10 options")
-        
-        # Validate each option
-        for j, option in enumerate(options):
-            if not isinstance(option, str):
-                errors.append(f"Question {question_num}, Option {j+1}: Must be a string")
-            elif len(option) > 100:  # Telegram option limit
-                errors.append(f"Question {question_num}, Option {j+1}: Option text too long (max 100 characters)")
-        
-        # Validate correct answer
-        correct_id = question.get("c")
-        if correct_id is None:
-            correct_id = question.get("correct")
-            if correct_id is None:
-                correct_id = question.get("correct_option_id", -1)
-        
-        if not isinstance(correct_id, int):
-            errors.append(f"Question {question_num}: Correct answer must be a number")
-        elif correct_id < 0 or correct_id >= len(options):
-            errors.append(f"Question {question_num}: Invalid correct answer index {correct_id}")
-        
-        # Validate explanation (optional)
-        explanation = question.get("e") or question.get("explanation", "")
-        if explanation and len(explanation) > 200:
-            errors.append(f"Question {question_num}: Explanation too long (max 200 characters)")
-        
-        return errors
-
-    async def send_quiz_questions(self, questions: List[Dict], chat_id: int, is_anonymous: bool = True) -> int:
-        """Enhanced quiz sending with batch processing and comprehensive error handling"""
-        success_count = 0
-        failed_questions = []
-        
-        try:
-            # Validate all questions first
-            for i, question in enumerate(questions):
-                question_errors = self._validate_question(question, i + 1)
-                if question_errors:
-                    failed_questions.append(f"Question {i + 1}: {'; '.join(question_errors)}")
-            
-            if failed_questions:
-                logger.error(f"Validation failed for {len(failed_questions)} questions")
-                return 0
-            
-            # Send questions with optimized batching
-            for i, question_data in enumerate(questions, 1):
-                try:
-                    question_text = (question_data.get("q") or question_data.get("question", ""))
-                    options = (question_data.get("o") or question_data.get("options", []))
-                    
-                    correct_id = question_data.get("c")
-                    if correct_id is None:
-                        correct_id = question_data.get("correct")
-                        if correct_id is None:
-                            correct_id = question_data.get("correct_option_id", 0)
-                    
-                    explanation = (question_data.get("e") or question_data.get("explanation", ""))
-                    
-                    poll_params = {
-                        "chat_id": chat_id,
-                        "question": question_text,
-                        "options": options,
-                        "type": "quiz",
-                        "correct_option_id": correct_id,
-                        "is_anonymous": is_anonymous
-                    }
-                    
-                    if explanation:
-                        poll_params["explanation"] = explanation
-                    
-                    result = await self.safe_send_poll(**poll_params)
-                    if result:
-                        success_count += 1
-                        logger.info(f"Successfully sent question {i}/{len(questions)}")
-                    else:
-                        logger.error(f"Failed to send question {i}/{len(questions)}")
-                    
-                    # Adaptive delay based on success rate
-                    if success_count > 0:
-                        delay = max(0.1, 0.5 / success_count)  # Faster as success rate increases
-                    else:
-                        delay = 1.0  # Slower if failures
-                    
-                    await asyncio.sleep(delay)
-                    
-                except Exception as e:
-                    logger.error(f"Error sending question {i}: {e}")
-                    continue
-            
-            # Log quiz completion
-            if success_count == len(questions):
-                logger.info(f"Successfully sent all {len(questions)} questions")
-            else:
-                logger.warning(f"Partial success: {success_count}/{len(questions)} questions sent")
-            
-            # Save quiz data to database
-            self._save_quiz_to_database(chat_id, questions, success_count > 0)
-            
-        except Exception as e:
-            logger.error(f"Critical error in quiz sending: {e}")
-            self.health_monitor.record_error("quiz_sending_error", str(e))
-        
-        return success_count
-    
-    def _save_quiz_to_database(self, chat_id: int, questions: List[Dict], success: bool):
-        """Save quiz data to database for analytics"""
-        try:
-            quiz_data_json = json.dumps(questions)
-            self.db_manager.execute_query(
-                """INSERT INTO quizzes (user_id, quiz_data, success, question_count)
-                   VALUES (?, ?, ?, ?)""",
-                (chat_id, quiz_data_json, success, len(questions))
-            )
-        except Exception as e:
-            logger.error(f"Failed to save quiz to database: {e}")
-
-    async def safe_edit_message(self, message, text, **kwargs):
-        """Optimized message editing"""
-        for attempt in range(self.max_retries):
-            try:
-                return await message.edit_text(text, **kwargs)
-            except (NetworkError, TimedOut) as e:
-                if attempt < self.max_retries - 1:
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
-                    continue
-                else:
-                    return None
-            except RetryAfter as e:
-                await asyncio.sleep(min(e.retry_after + 1, 5))
-                continue
-            except BadRequest:
-                return None
-            except Exception:
-                return None
-        return None
-
-    async def safe_send_poll(self, **poll_params):
-        """Optimized poll sending"""
-        for attempt in range(self.max_retries):
-            try:
-                bot = self.application.bot
-                return await bot.send_poll(**poll_params)
-            except (NetworkError, TimedOut) as e:
-                if attempt < self.max_retries - 1:
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
-                    continue
-                else:
-                    return None
-            except RetryAfter as e:
-                await asyncio.sleep(min(e.retry_after + 1, 5))
-                continue
-            except BadRequest:
-                return None
-            except Exception:
-                return None
-        return None
-
-    async def send_quiz_questions(self, questions: list, chat_id: str, is_anonymous: bool = True):
-        """Send quiz questions with optimized batch processing"""
-        success_count = 0
-
-        for i, question_data in enumerate(questions, 1):
-            try:
-                question_text = (question_data.get("q") or question_data.get("question", ""))
-                options = (question_data.get("o") or question_data.get("options", []))
-
-                correct_id = question_data.get("c")
-                if correct_id is None:
-                    correct_id = question_data.get("correct")
-                    if correct_id is None:
-                        correct_id = question_data.get("correct_option_id", 0)
-
-                explanation = (question_data.get("e") or question_data.get("explanation", ""))
-
-                poll_params = {
-                    "chat_id": chat_id,
-                    "question": question_text,
-                    "options": options,
-                    "type": "quiz",
-                    "correct_option_id": correct_id,
-                    "is_anonymous": is_anonymous
-                }
-
-                if explanation:
-                    poll_params["explanation"] = explanation
+        """Save user session to database"""
+        try:
+            self.db_manager.upsert_user(
+                session.user_id, session.username, session.first_name,
+                datetime.fromtimestamp(session.last_seen_ts).isoformat(), session.request_count,
+                msgspec.msgpack.encode(session.quiz_preferences),
+                msgspec.msgpack.encode({'state': session.current_state})
+            )
+        except Exception as e:
+            logger.error("Failed to save user session: %s", e)
+    
+    async def update_user_activity(self, user_id: int) -> UserContext:
+        """Record user activity and return the user's conversation context"""
+        return await self.user_store.load(user_id)
+    
+    async def save_user(self, user_id: int, user: UserContext):
+        """Persist changes made to a user's conversation context"""
+        await self.user_store.save(user_id, user)
+    
+    def _check_rate_limit(self, user_id: int) -> bool:
+        """Check if user is within rate limits"""
+        return self.limiter.is_allowed(user_id)
 
-                result = await self.safe_send_poll(**poll_params)
-                if result:
-                    success_count += 1
+    def _truncate(self, text: str) -> str:
+        """Truncate text to the configured message length
 
-                # Reduced delay for faster quiz delivery
-                await asyncio.sleep(0.03)
+        Text is already MarkdownV2, so it is cut after the last complete line
+        rather than mid-entity; entities other than code blocks never span lines.
+        """
+        if len(text) <= self.config.max_message_length:
+            return text
+        head = text[:max(text.rfind("\n", 0, self._truncate_at), 0)]
+        if head.count("```") % 2:
+            head += "\n```"  # Close a code block cut in half
+        # "…" needs no MarkdownV2 escaping
+        return head + "\n…" if head else "…"
+
+    async def reply_to(self, update: Update, text: str, *,
+                       markup: Optional[InlineKeyboardMarkup] = None,
+                       parse_mode: Optional[str] = DEFAULT_PARSE_MODE) -> Optional[Any]:
+        """Send a message to the chat an update came from"""
+        return await self.safe_send_message(update.effective_chat.id, text, markup=markup, parse_mode=parse_mode)
+
+    async def _retry(self, make_call, action: str) -> Optional[Any]:
+        """Await a Telegram API call, retrying network failures with backoff
+
+        Flood control (429 RetryAfter) is handled by the application's AIORateLimiter.
+        """
+        if not self.application or not self.application.bot:
+            logger.error("Bot application not available (%s)", action)
+            return None
 
-            except Exception:
-                pass
+        self.total_requests += 1
+        bot = self.application.bot
+        max_retries = self.config.max_retries
+        retry_delay = self.config.retry_delay
 
-        return success_count
+        for attempt in range(max_retries):
+            try:
+                result = await make_call(bot)
+                self.successful_requests += 1
+                if attempt:
+                    logger.warning("%s succeeded after %s network retries", action, attempt)
+                return result
 
-    async def get_welcome_messages(self):
-        """Get welcome messages"""
-        message1 = """🎯 **Simple Quiz Bot** ⚡
+            except BadRequest as e:
+                # Checked before NetworkError (its base class) so a 400 fails fast instead of retrying
+                logger.error("Bad request (%s): %s", action, e)
+                self.health_monitor.record_error("bad_request", str(e))
+                break
 
-✨ Create MCQ quizzes instantly!
+            except (NetworkError, TimedOut) as e:
+                if attempt < max_retries - 1:
+                    # Capped exponential backoff with multiplicative jitter so concurrent
+                    # failing sends spread out instead of retrying in lockstep
+                    await asyncio.sleep(min(10.0, retry_delay * 2 ** attempt) * (0.5 + random.random()))
+                    continue
+                logger.warning("%s failed after %s attempts: %s", action, attempt + 1, e)
+                self.health_monitor.record_error("network_error", str(e))
+                break
 
-💡 **Rules:**
-• `q` = question, `o` = options, `c` = correct, `e` = explanation  
-• `c` starts from 0 (0=A, 1=B, 2=C, 3=D)
-• 2-4 options allowed per question
-• Keep short to fit Telegram limits
+            except TelegramError as e:
+                logger.error("Telegram error (%s): %s", action, e)
+                self.health_monitor.record_error("telegram_error", str(e))
+                break
 
-🚀 **Fast • Reliable • Professional** 🎓"""
+            except Exception as e:
+                logger.error("Unexpected error (%s): %s", action, e)
+                self.health_monitor.record_error("unexpected_error", str(e))
+                break
 
-        message2 = """{"all_q":[{"q":"Capital of France? 🇫🇷","o":["London","Paris","Berlin","Madrid"],"c":1,"e":"Paris is the capital and largest city of France 🗼"},{"q":"What is 2+2? 🔢","o":["3","4","5","6"],"c":1,"e":"Basic addition: 2+2=4 ✅"}]}"""
+        self.failed_requests += 1
+        return None
 
-        return message1, message2
+    async def safe_send_message(self, chat_id: int, text: str, *,
+                                markup: Optional[InlineKeyboardMarkup] = None,
+                                parse_mode: Optional[str] = DEFAULT_PARSE_MODE) -> Optional[Any]:
+        """Send a message, truncated to the configured length"""
+        text = self._truncate(text)
+        return await self._retry(
+            lambda bot: bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode, reply_markup=markup),
+            "send message"
+        )
 
-    async def get_quiz_type_selection_message(self):
-        """Get quiz type selection message"""
-        return """🎭 **Choose Your Quiz Style:**
+    async def safe_edit_message(self, message: Any, text: str, *,
+                                parse_mode: Optional[str] = DEFAULT_PARSE_MODE) -> Optional[Any]:
+        """Edit a previously sent message, truncated to the configured length"""
+        text = self._truncate(text)
+        return await self._retry(
+            lambda bot: message.edit_text(text, parse_mode=parse_mode),
+            "edit message"
+        )
 
-🔒 **Anonymous Quiz:**
-✅ Can forward to channels and groups
-✅ Voters remain private
-✅ Perfect for public sharing
+    async def safe_send_poll(self, **poll_params) -> Optional[Any]:
+        """Send a quiz poll"""
+        return await self._retry(lambda bot: bot.send_poll(**poll_params), "send poll")
+
+    def _save_quiz_to_database(self, chat_id: int, questions: List[tuple], success: bool):
+        """Queue quiz data for the batched analytics insert"""
+        quiz_data_json = orjson.dumps([
+            {"q": question_text, "o": options, "c": correct_id, "e": explanation}
+            for question_text, options, correct_id, explanation in questions
+        ]).decode()
+        self._quiz_save_queue.put_nowait((chat_id, quiz_data_json, success, len(questions)))
+
+    async def _quiz_writer_loop(self):
+        """Insert queued quizzes in batches of up to _quiz_batch_size rows"""
+        save_queue = self._quiz_save_queue
+        loop = asyncio.get_running_loop()
+        while True:
+            rows = [await save_queue.get()]
+            deadline = loop.time() + self._quiz_batch_wait
+            try:
+                while len(rows) < self._quiz_batch_size:
+                    async with asyncio.timeout_at(deadline):
+                        rows.append(await save_queue.get())
+            except TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                # Leave the partial batch for flush_quiz_saves()
+                for row in rows:
+                    save_queue.put_nowait(row)
+                raise
+            try:
+                await asyncio.shield(self.db_manager.execute_many(INSERT_QUIZ_SQL, rows))
+            except Exception as e:
+                logger.error("Failed to save %s quizzes to database: %s", len(rows), e)
+
+    async def flush_quiz_saves(self):
+        """Write any quizzes still waiting in the save queue"""
+        rows = []
+        while not self._quiz_save_queue.empty():
+            rows.append(self._quiz_save_queue.get_nowait())
+        if rows:
+            try:
+                await self.db_manager.execute_many(INSERT_QUIZ_SQL, rows)
+            except Exception as e:
+                logger.error("Failed to save %s quizzes to database: %s", len(rows), e)
 
-👤 **Non-Anonymous Quiz:**  
-✅ Shows who answered each question
-✅ Great for tracking participation
-❌ Cannot be forwarded to channels
+    async def send_quiz_questions(self, questions: List[tuple], chat_id: int, is_anonymous: bool = True) -> int:
+        """Send validated (question, options, correct_id, explanation) tuples as quiz polls
 
-**Which style do you prefer?** 👇✨"""
+        explanation is None when the question has none, so it is passed through as is.
+        """
+        success_count = 0
+        # One poll at a time so they arrive in question order; AIORateLimiter does the pacing
+        for question_text, options, correct_id, explanation in questions:
+            result = await self.safe_send_poll(
+                chat_id=chat_id,
+                question=question_text,
+                options=options,
+                type="quiz",
+                correct_option_id=correct_id,
+                is_anonymous=is_anonymous,
+                explanation=explanation
+            )
+            if result:
+                success_count += 1
 
-    async def get_json_request_message(self, is_anonymous: bool):
-        """Get JSON request message"""
-        quiz_type = "🔒 Anonymous" if is_anonymous else "👤 Non-Anonymous"
-        return f"""✅ **{quiz_type} Quiz Selected!** 🎉
+        if success_count == len(questions):
+            logger.info("Successfully sent all %s questions", len(questions))
+        else:
+            logger.warning("Partial success: %s/%s questions sent", success_count, len(questions))
 
-📝 **Next Steps:**
-1️⃣ Copy the above JSON template
-2️⃣ Give it to ChatGPT/AI 🤖
-3️⃣ Ask to customize with your questions in our format
+        # Save quiz data to database
+        self._save_quiz_to_database(chat_id, questions, success_count > 0)
 
-🚀 **Then send me your customized JSON:** 👇⚡"""
+        return success_count
 
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command"""
         user_id = update.effective_user.id
         user_name = update.effective_user.first_name or "Friend"
 
-        self.update_user_activity(user_id)
-        self.user_states[user_id] = "choosing_type"
+        user = await self.update_user_activity(user_id)
+        user.state = "choosing_type"
+        await self.save_user(user_id, user)
 
-        msg1, _ = await self.get_welcome_messages()
-        result = await self.safe_send_message(
-            update.effective_chat.id,
-            f"👋 Hello **{user_name}**! 🌟\n\n{msg1}",
-            parse_mode='Markdown'
-        )
+        result = await self.reply_to(update, START_GREETING_MESSAGE % escape_markdown_v2(user_name))
 
         if result:
             await self.show_quiz_type_selection(update)
 
     async def show_quiz_type_selection(self, update):
         """Show quiz type selection"""
-        keyboard = [
-            [InlineKeyboardButton("🔒 Anonymous Quiz (Can forward to channels)", callback_data="anonymous_true")],
-            [InlineKeyboardButton("👤 Non-Anonymous Quiz (Shows who voted)", callback_data="anonymous_false")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-
-        selection_msg = await self.get_quiz_type_selection_message()
-
-        await self.safe_send_message(
-            update.effective_chat.id,
-            selection_msg,
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
-        )
+        await self.reply_to(update, QUIZ_TYPE_SELECTION_MESSAGE, markup=QUIZ_TYPE_KEYBOARD)
 
     async def handle_quiz_type_selection(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle quiz type selection"""
@@ -1086,148 +1504,84 @@ class EnhancedTelegramQuizBot:
         user_id = query.from_user.id
         is_anonymous = query.data == "anonymous_true"
 
-        self.update_user_activity(user_id)
-        self.user_preferences[user_id] = is_anonymous
-        self.user_states[user_id] = "waiting_for_json"
-
-        quiz_type = "🔒 Anonymous" if is_anonymous else "👤 Non-Anonymous"
+        user = await self.update_user_activity(user_id)
+        user.is_anonymous = is_anonymous
+        user.state = "waiting_for_json"
+        await self.save_user(user_id, user)
 
-        result = await self.safe_edit_message(
-            query.message,
-            f"✅ **{quiz_type} Quiz Selected!** 🎉\n\n⏭️ **Next:** JSON template coming... ⚡",
-            parse_mode='Markdown'
-        )
-
-        if result:
-            await asyncio.sleep(0.05)  # Reduced delay
-            _, msg2 = await self.get_welcome_messages()
-            await self.safe_send_message(query.message.chat_id, f"{msg2}")
-            await asyncio.sleep(0.05)
-            json_request = await self.get_json_request_message(is_anonymous)
-            await self.safe_send_message(query.message.chat_id, json_request, parse_mode='Markdown')
+        await self.safe_edit_message(query.message, QUIZ_TYPE_SELECTED_MESSAGES[is_anonymous])
 
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /help command"""
         user_id = update.effective_user.id
-        self.update_user_activity(user_id)
-
-        help_text = """🆘 **Quiz Bot Help** 📚
-
-🤖 **Commands:**
-• `/start` ⭐ - Begin quiz creation
-• `/quickstart` ⚡ - Quick 5-step guide
-• `/template` 📋 - Get JSON template
-• `/help` 🆘 - Show this help
-• `/status` 📊 - Check settings
-• `/toggle` 🔄 - Switch quiz types
+        await self.update_user_activity(user_id)
 
-📚 **JSON Format:**
-• `all_q` 📝 - Questions array
-• `q` ❓ - Question text
-• `o` 📝 - Answer options (2-4 choices)
-• `c` ✅ - Correct answer (0=A, 1=B, 2=C, 3=D)
-• `e` 💡 - Explanation (optional)
-
-💡 **Pro Tip:** Use `/quickstart` for fastest setup! 🚀"""
-
-        await self.safe_send_message(update.effective_chat.id, help_text, parse_mode='Markdown')
+        await self.reply_to(update, HELP_MESSAGE)
 
     async def template_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /template command"""
         user_id = update.effective_user.id
-        self.update_user_activity(user_id)
+        await self.update_user_activity(user_id)
 
-        template_msg = """📋 **4-Option JSON Template:** 🎯"""
-        result1 = await self.safe_send_message(update.effective_chat.id, template_msg, parse_mode='Markdown')
+        result1 = await self.reply_to(update, TEMPLATE_HEADER_MESSAGE)
 
         if result1:
-            _, json_template = await self.get_welcome_messages()
-            result2 = await self.safe_send_message(update.effective_chat.id, json_template)
+            result2 = await self.reply_to(update, WELCOME_JSON_TEMPLATE, parse_mode=None)
             if result2:
-                await self.safe_send_message(
-                    update.effective_chat.id,
-                    "💡 **Copy above template → Give to ChatGPT → Ask to customize with your questions!** 🤖✨",
-                    parse_mode='Markdown'
-                )
+                await self.reply_to(update, TEMPLATE_FOOTER_MESSAGE)
 
     async def quick_start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /quickstart command"""
         user_id = update.effective_user.id
-        self.update_user_activity(user_id)
-
-        quick_msg = """⚡ **Quick Start Guide:** 🚀
-
-1️⃣ Use `/template` to get 4-option JSON format 📋
-2️⃣ Copy template → Give to AI (ChatGPT) 🤖  
-3️⃣ Ask AI: "Customize with my questions in this format" 💭
-4️⃣ Send customized JSON to me 📤
-5️⃣ Get instant interactive quizzes! 🎯✨
+        await self.update_user_activity(user_id)
 
-**Need help?** Use `/help` for detailed guide 📚"""
-
-        await self.safe_send_message(update.effective_chat.id, quick_msg, parse_mode='Markdown')
+        await self.reply_to(update, QUICK_START_MESSAGE)
 
     async def toggle_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /toggle command"""
         user_id = update.effective_user.id
-        self.update_user_activity(user_id)
-
-        keyboard = [
-            [InlineKeyboardButton("🔒 Switch to Anonymous", callback_data="anonymous_true")],
-            [InlineKeyboardButton("👤 Switch to Non-Anonymous", callback_data="anonymous_false")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-
-        current_type = "🔒 Anonymous" if self.user_preferences.get(user_id, True) else "👤 Non-Anonymous"
+        user = await self.update_user_activity(user_id)
 
-        await self.safe_send_message(
-            update.effective_chat.id,
-            f"⚙️ **Current Setting:** {current_type} 📊\n\n🔄 **Quick Toggle:** Choose your preferred quiz type: 👇✨",
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
-        )
+        await self.reply_to(update, TOGGLE_MESSAGES[user.is_anonymous], markup=TOGGLE_KEYBOARD)
 
     async def status_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /status command"""
         user_chat_id = update.effective_chat.id
         user_id = update.effective_user.id
         user_name = update.effective_user.first_name or "User"
-        self.update_user_activity(user_id)
+        user = await self.update_user_activity(user_id)
 
-        is_anonymous = self.user_preferences.get(user_id, True)
-        quiz_type = "🔒 Anonymous" if is_anonymous else "👤 Non-Anonymous"
+        is_anonymous = user.is_anonymous
         status_emoji = "🟢" if is_anonymous else "🔵"
-        active_users = len(self.user_preferences)
+        active_users = await self.user_store.count()
 
         await self.safe_send_message(
             user_chat_id,
-            f"{status_emoji} **Bot Status: Active & Ready!** ⚡\n\n"
-            f"👤 **User:** {user_name} 🌟\n"
-            f"📍 **Chat ID:** `{user_chat_id}` 🔢\n"
-            f"🎯 **Quiz Type:** {quiz_type} 🎭\n"
-            f"{'🔐 Perfect for channels & forwarding 📡' if is_anonymous else '👁️ Shows voter participation 📊'}\n"
-            f"📊 **Active Users:** {active_users} 👥\n\n"
-            f"🚀 **Ready to create amazing quizzes!** ✨",
-            parse_mode='Markdown'
+            STATUS_MESSAGE % (
+                status_emoji,
+                escape_markdown_v2(user_name),
+                user_chat_id,
+                ESCAPED_QUIZ_TYPE_LABELS[is_anonymous],
+                escape_markdown_v2('🔐 Perfect for channels & forwarding 📡' if is_anonymous else '👁️ Shows voter participation 📊'),
+                active_users
+            )
         )
 
     async def restart_cycle(self, update: Update):
         """Restart the welcome cycle"""
         user_id = update.effective_user.id
-        self.update_user_activity(user_id)
-        self.user_states[user_id] = "choosing_type"
+        user = await self.update_user_activity(user_id)
+        user.state = "choosing_type"
+        await self.save_user(user_id, user)
 
-        await asyncio.sleep(0.05)  # Reduced delay
-        restart_msg = f"""🎉 **Ready for another quiz?** ✨"""
-        result1 = await self.safe_send_message(update.effective_chat.id, restart_msg, parse_mode='Markdown')
+        await self.reply_to(update, RESTART_MESSAGE, markup=QUIZ_TYPE_KEYBOARD)
 
-        if result1:
-            await asyncio.sleep(0.05)
-            msg1, _ = await self.get_welcome_messages()
-            result2 = await self.safe_send_message(update.effective_chat.id, msg1, parse_mode='Markdown')
-            if result2:
-                await asyncio.sleep(0.05)
-                await self.show_quiz_type_selection(update)
+    async def _fail_and_restart(self, update: Update, processing_msg: Any, text: str):
+        """Report a failed submission on the processing message and restart the cycle"""
+        await asyncio.gather(
+            self.safe_edit_message(processing_msg, text),
+            self.restart_cycle(update)
+        )
 
     async def handle_json_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle JSON messages with faster processing"""
@@ -1236,134 +1590,96 @@ class EnhancedTelegramQuizBot:
         user_id = update.effective_user.id
         user_name = update.effective_user.first_name or "User"
 
-        self.update_user_activity(user_id)
+        user = await self.update_user_activity(user_id)
 
-        if self.user_states.get(user_id) != "waiting_for_json":
-            result = await self.safe_send_message(user_chat_id, "🔄 **Let's start properly!** ✨", parse_mode='Markdown')
+        if user.state != "waiting_for_json":
+            result = await self.safe_send_message(user_chat_id, START_PROPERLY_MESSAGE)
             if result:
                 await self.start_command(update, None)
             return
 
-        is_anonymous = self.user_preferences.get(user_id, True)
-        processing_msg = await self.safe_send_message(user_chat_id, "🔄 **Processing your quiz JSON...** ⚡🎯")
+        is_anonymous = user.is_anonymous
+        processing_msg = await self.safe_send_message(user_chat_id, PROCESSING_MESSAGE)
 
         if not processing_msg:
             return
 
         try:
-            quiz_data = json.loads(user_message)
-            questions = quiz_data.get("all_q", quiz_data.get("q", quiz_data.get("all_questions", [])))
-
-            if not questions:
-                await self.safe_edit_message(
-                    processing_msg,
-                    "❌ **No questions found!** 🔍\n\n🔄 **Let's restart with proper format...** 📋",
-                    parse_mode='Markdown'
-                )
-                await asyncio.sleep(0.3)
-                await self.restart_cycle(update)
-                return
-
-            # Fast validation logic
-            for i, question in enumerate(questions):
-                question_text = question.get("q") or question.get("question", "")
-                options = question.get("o") or question.get("options", [])
-                correct_id = question.get("c")
-                if correct_id is None:
-                    correct_id = question.get("correct")
-                    if correct_id is None:
-                        correct_id = question.get("correct_option_id", -1)
-
-                # Quick validation checks
-                if not question_text or not options or correct_id is None or correct_id == -1:
-                    await self.safe_edit_message(
-                        processing_msg,
-                        f"❌ **Question {i + 1}: Invalid format** 📝\n\n🔄 **Restarting...** 🔄",
-                        parse_mode='Markdown'
-                    )
-                    await asyncio.sleep(0.2)
-                    await self.restart_cycle(update)
+            normalized = decode_template_quiz(user_message)
+            if normalized is None:
+                # Long key names or mistakes: check field by field for a precise error
+                quiz_data = orjson.loads(user_message)
+                questions = None
+                if isinstance(quiz_data, dict):
+                    questions = next((quiz_data[k] for k in QUESTION_KEYS if k in quiz_data), None)
+
+                if not questions or not isinstance(questions, list):
+                    await self._fail_and_restart(update, processing_msg, NO_QUESTIONS_MESSAGE)
                     return
 
-                if not isinstance(options, list) or len(options) < 2 or len(options) > 4:
-                    await self.safe_edit_message(
-                        processing_msg,
-                        f"❌ **Question {i + 1}: Invalid options** 📝\n\n🔄 **Restarting...** 🔄",
-                        parse_mode='Markdown'
-                    )
-                    await asyncio.sleep(0.2)
-                    await self.restart_cycle(update)
+                # Stay in waiting_for_json on these so the corrected JSON can be sent right away
+                if len(questions) > self.config.max_questions_per_quiz:
+                    await self.safe_edit_message(processing_msg, self._too_many_questions_message)
                     return
 
-                if not isinstance(correct_id, int) or correct_id >= len(options) or correct_id < 0:
-                    await self.safe_edit_message(
-                        processing_msg,
-                        f"❌ **Question {i + 1}: Invalid 'c' value** 🔢\n\n🔄 **Restarting...** 🔄",
-                        parse_mode='Markdown'
-                    )
-                    await asyncio.sleep(0.2)
-                    await self.restart_cycle(update)
+                normalized, problems = normalize_questions(questions)
+                if problems:
+                    await self.safe_edit_message(processing_msg, INVALID_QUESTIONS_MESSAGE % format_problems(problems))
                     return
 
+            elif len(normalized) > self.config.max_questions_per_quiz:
+                await self.safe_edit_message(processing_msg, self._too_many_questions_message)
+                return
+
             quiz_type = "anonymous" if is_anonymous else "non-anonymous"
             await self.safe_edit_message(
                 processing_msg,
-                f"✅ **{len(questions)} questions validated!** 🎯\n🚀 Sending {quiz_type} polls... ⚡",
-                parse_mode='Markdown'
+                VALIDATED_MESSAGE % (len(normalized), escape_markdown_v2(quiz_type))
             )
 
-            success_count = await self.send_quiz_questions(questions, user_chat_id, is_anonymous)
+            success_count = await self.send_quiz_questions(normalized, user_chat_id, is_anonymous)
 
-            if success_count == len(questions):
-                quiz_type_text = "🔒 Anonymous" if is_anonymous else "👤 Non-Anonymous"
-                completion_msg = f"🎯 **{success_count} {quiz_type_text} quizzes sent successfully!** ✅🎉"
-                await self.safe_edit_message(processing_msg, completion_msg, parse_mode='Markdown')
-                logger.warning(f"Served MCQs to {user_name}")
+            if success_count == len(normalized):
+                completion_msg = COMPLETION_MESSAGE % (success_count, ESCAPED_QUIZ_TYPE_LABELS[is_anonymous])
+                await self.safe_edit_message(processing_msg, completion_msg)
+                logger.warning("Served MCQs to %s", user_name)
                 await self.restart_cycle(update)
             else:
-                await self.safe_edit_message(
-                    processing_msg,
-                    f"⚠️ **Partial Success:** {success_count}/{len(questions)} questions sent 📊\n\n🔄 **Restarting...** 🔄",
-                    parse_mode='Markdown'
+                await self._fail_and_restart(
+                    update, processing_msg,
+                    PARTIAL_SUCCESS_MESSAGE % (success_count, len(normalized))
                 )
-                await asyncio.sleep(0.2)
-                await self.restart_cycle(update)
 
-        except json.JSONDecodeError:
-            await self.safe_edit_message(
-                processing_msg,
-                "❌ **Invalid JSON Format!** 📋\n\n🔄 **Let's restart with proper format...** ✨",
-                parse_mode='Markdown'
-            )
-            await asyncio.sleep(0.2)
-            await self.restart_cycle(update)
+        except orjson.JSONDecodeError:
+            await self._fail_and_restart(update, processing_msg, INVALID_JSON_MESSAGE)
         except Exception:
-            await self.safe_edit_message(
-                processing_msg,
-                "❌ **Error occurred!** ⚠️\n\n🔄 **Restarting...** 🔄",
-                parse_mode='Markdown'
-            )
-            await asyncio.sleep(0.2)
-            await self.restart_cycle(update)
+            await self._fail_and_restart(update, processing_msg, ERROR_MESSAGE)
 
     async def setup_application_fast(self):
         """Optimized setup for faster cold starts"""
         try:
             self.application = (Application.builder()
                                 .token(self.telegram_token)
-                                .pool_timeout(20)          # Reduced from 60
-                                .connection_pool_size(2)    # Reduced from 4
+                                .pool_timeout(10)
+                                .connection_pool_size(64)   # Room for concurrent sends across chats
                                 .get_updates_pool_timeout(30)  # Reduced from 60
                                 .read_timeout(15)          # Reduced from 30
                                 .write_timeout(15)         # Reduced from 30
                                 .connect_timeout(10)       # Reduced from 30
+                                .concurrent_updates(256)   # Bound in-flight updates during floods
+                                .rate_limiter(AIORateLimiter(
+                                    overall_max_rate=self.config.global_send_rate,
+                                    group_max_rate=self.config.chat_send_rate,
+                                    max_retries=self.config.max_retries
+                                ))
                                 .build())
 
-            def error_handler(update, context):
+            async def error_handler(update, context):
                 error = context.error
                 if isinstance(error, (NetworkError, TimedOut)):
                     return
-                logger.warning(f"Bot error: {type(error).__name__}")
+                logger.warning("Bot error: %s", type(error).__name__)
+                self.health_monitor.record_error("update_error", str(error))
 
             self.application.add_error_handler(error_handler)
 
@@ -1392,26 +1708,27 @@ class EnhancedTelegramQuizBot:
 
             try:
                 await self.application.bot.set_webhook(url=webhook_url)
-                logger.warning(f"✅ Webhook set to: {webhook_url}")
+                logger.warning("✅ Webhook set to: %s", webhook_url)
                 
                 # Verify webhook info
                 webhook_info = await self.application.bot.get_webhook_info()
-                logger.warning(f"📡 Webhook info: {webhook_info.url} | Pending updates: {webhook_info.pending_update_count}")
+                logger.warning("📡 Webhook info: %s | Pending updates: %s", webhook_info.url, webhook_info.pending_update_count)
                 
             except Exception as e:
-                logger.error(f"❌ Webhook setup error: {e}")
-                logger.error(f"❌ Error type: {type(e).__name__}")
+                logger.error("❌ Webhook setup error: %s", e)
+                logger.error("❌ Error type: %s", type(e).__name__)
                 import traceback
-                logger.error(f"❌ Traceback: {traceback.format_exc()}")
+                logger.error("❌ Traceback: %s", traceback.format_exc())
 
         except Exception as e:
-            logger.error(f"Application setup failed: {e}")
+            logger.error("Application setup failed: %s", e)
             raise
 
 
 # Global bot instance and configuration
 bot_instance = None
 bot_config = None
+bot_config_dict = None  # asdict(bot_config), built once for /debug
 
 def create_bot_config() -> BotConfig:
     """Create bot configuration from environment variables"""
@@ -1431,9 +1748,15 @@ def create_bot_config() -> BotConfig:
         max_concurrent_requests=int(os.environ.get('MAX_CONCURRENT_REQUESTS', 10)),
         memory_cleanup_interval=int(os.environ.get('MEMORY_CLEANUP_INTERVAL', 300)),
         user_data_retention_hours=int(os.environ.get('USER_DATA_RETENTION_HOURS', 24)),
+        user_state_timeout_seconds=int(os.environ.get('USER_STATE_TIMEOUT_SECONDS', 3600)),
+        max_tracked_users=int(os.environ.get('MAX_TRACKED_USERS', 10000)),
+        max_pending_updates=int(os.environ.get('MAX_PENDING_UPDATES', 1000)),
         max_requests_per_minute=int(os.environ.get('MAX_REQUESTS_PER_MINUTE', 60)),
         max_requests_per_hour=int(os.environ.get('MAX_REQUESTS_PER_HOUR', 1000)),
+        global_send_rate=int(os.environ.get('GLOBAL_SEND_RATE', 25)),
+        chat_send_rate=int(os.environ.get('CHAT_SEND_RATE', 20)),
         db_path=os.environ.get('DB_PATH', 'bot_data.db'),
+        redis_url=os.environ.get('REDIS_URL'),
         backup_interval_hours=int(os.environ.get('BACKUP_INTERVAL_HOURS', 6)),
         health_check_interval=int(os.environ.get('HEALTH_CHECK_INTERVAL', 60)),
         max_memory_usage_mb=int(os.environ.get('MAX_MEMORY_USAGE_MB', 512)),
@@ -1444,32 +1767,26 @@ def create_bot_config() -> BotConfig:
 
 def initialize_bot():
     """Enhanced bot initialization with comprehensive error handling"""
-    global bot_instance, bot_config
+    global bot_instance, bot_config, bot_config_dict
 
     try:
         logger.info("🔧 Initializing enhanced Telegram bot...")
         
         # Create configuration
         bot_config = create_bot_config()
+        bot_config_dict = asdict(bot_config)
         logger.info("✅ Configuration loaded successfully")
         
         # Initialize bot
         bot_instance = EnhancedTelegramQuizBot(bot_config)
         logger.info("✅ Bot instance created successfully")
         
-        # Setup application
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(bot_instance.setup_application_fast())
-        loop.close()
-        
-        logger.info("🚀 Enhanced bot initialization complete! v3.0.1")
         return bot_instance
         
     except Exception as e:
-        logger.error(f"❌ Bot initialization failed: {e}")
-        logger.error(f"❌ Error type: {type(e).__name__}")
-        logger.error(f"❌ Traceback: {traceback.format_exc()}")
+        logger.error("❌ Bot initialization failed: %s", e)
+        logger.error("❌ Error type: %s", type(e).__name__)
+        logger.error("❌ Traceback: %s", traceback.format_exc())
         
         # Attempt graceful degradation
         if bot_instance:
@@ -1480,69 +1797,116 @@ def initialize_bot():
         
         return None
 
-# Initialize bot when module loads
-bot_instance = initialize_bot()
+@app.before_serving
+async def startup():
+    """Create the bot and its Telegram application on the serving event loop"""
+    global bot_instance
+
+    if not initialize_bot():
+        return
+
+    try:
+        await bot_instance.setup_application_fast()
+        bot_instance.start_background_tasks()
+        logger.info("🚀 Enhanced bot initialization complete! v3.0.1")
+    except Exception as e:
+        logger.error("❌ Application startup failed: %s", e)
+        bot_instance.health_monitor.record_error("initialization_error", str(e))
+        bot_instance = None
+
+
+@app.after_serving
+async def shutdown():
+    """Graceful shutdown: stop update processing and persist state"""
+    global bot_instance
+
+    try:
+        if not bot_instance:
+            return
+
+        logger.info("Initiating graceful shutdown...")
+        await bot_instance.stop_background_tasks()
+        if bot_instance.application:
+            await bot_instance.application.stop()
+            await bot_instance.application.shutdown()
+        await bot_instance.flush_quiz_saves()
+
+        await bot_instance.user_store.close()
+
+        # Save all active sessions
+        for user_id, session in bot_instance.active_sessions.items():
+            bot_instance._save_user_session_to_db(session)
+
+        bot_instance._flush_metrics()
+
+        # Create final database backup
+        bot_instance.db_manager.backup_database()
+        bot_instance.db_manager.close()
+
+        logger.info("Graceful shutdown completed")
+    except Exception as e:
+        logger.error("Error during graceful shutdown: %s", e)
+    finally:
+        # Flush queued log records
+        logger_instance.close()
 
 
 @app.route('/webhook', methods=['POST'])
-def webhook():
+async def webhook():
     """Enhanced webhook with comprehensive error handling and rate limiting"""
     global bot_instance
     
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     # Check bot availability
     if not bot_instance or not bot_instance.application:
         logger.warning("Bot not ready for webhook requests")
         return jsonify({"error": "Bot initializing", "status": "unavailable"}), 503
     
+    # Shed load while the update queue is backed up; Telegram retries on non-2xx
+    if bot_instance.application.update_queue.qsize() >= bot_instance.config.max_pending_updates:
+        logger.warning("Update backlog full, deferring webhook request")
+        return jsonify({"error": "Update backlog full", "status": "busy"}), 503
+    
     try:
-        # Get request data
-        update_data = request.get_json()
+        # Read once without caching the buffer on the request; orjson parses the bytes directly
+        body = await request.get_data(cache=False)
+        try:
+            update_data = orjson.loads(body) if body else None
+        except orjson.JSONDecodeError:
+            logger.warning("Webhook body is not valid JSON")
+            return jsonify({"error": "Invalid JSON", "status": "invalid"}), 400
         if not update_data:
             logger.warning("Empty webhook request received")
             return jsonify({"error": "No data", "status": "invalid"}), 400
+        if not isinstance(update_data, dict):
+            logger.warning("Webhook body is not a JSON object")
+            return jsonify({"error": "Update must be a JSON object", "status": "invalid"}), 400
         
         # Extract user info for rate limiting
-        user_id = None
-        if 'message' in update_data:
-            user_id = update_data['message'].get('from', {}).get('id')
-        elif 'callback_query' in update_data:
-            user_id = update_data['callback_query'].get('from', {}).get('id')
+        payload = update_data.get('message') or update_data.get('callback_query')
+        sender = payload and payload.get('from')
+        user_id = sender and sender.get('id')
         
         # Rate limiting check
         if user_id and not bot_instance._check_rate_limit(user_id):
-            logger.warning(f"Rate limit exceeded for user {user_id}")
+            logger.warning("Rate limit exceeded for user %s", user_id)
             return jsonify({"error": "Rate limit exceeded", "status": "rate_limited"}), 429
         
         # Parse update
         update = Update.de_json(update_data, bot_instance.application.bot)
         
-        # Process update with timeout
-        try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            # Set timeout for processing
-            task = loop.create_task(bot_instance.application.process_update(update))
-            loop.run_until_complete(asyncio.wait_for(task, timeout=30))
-            
-            loop.close()
-            
-            # Log successful processing
-            processing_time = time.time() - start_time
-            logger.info(f"Webhook processed successfully in {processing_time:.2f}s")
-            
-            return jsonify({"status": "success", "processing_time": processing_time}), 200
-            
-        except asyncio.TimeoutError:
-            logger.error("Webhook processing timeout")
-            bot_instance.health_monitor.record_error("webhook_timeout", "Processing timeout")
-            return jsonify({"error": "Processing timeout", "status": "timeout"}), 408
+        # Hand off to the application's update queue; Telegram only needs the 200
+        bot_instance.application.update_queue.put_nowait(update)
+        
+        processing_time = time.perf_counter() - start_time
+        logger.info("Webhook accepted in %.4fs", processing_time)
+        
+        return jsonify({"status": "accepted", "processing_time": processing_time}), 200
             
     except Exception as e:
-        processing_time = time.time() - start_time
-        logger.error(f"Webhook error: {type(e).__name__} - {str(e)}")
+        processing_time = time.perf_counter() - start_time
+        logger.error("Webhook error: %s - %s", type(e).__name__, e)
         
         # Record error
         if bot_instance:
@@ -1555,55 +1919,20 @@ def webhook():
         }), 500
 
 
+# Pre-rendered health responses; detailed numbers live under /metrics
+_HEALTH_HEADERS = {"Content-Type": "application/json", "Cache-Control": "no-cache"}
+_HEALTHY = (b'{"status":"healthy"}', 200, _HEALTH_HEADERS)
+_NOT_INITIALIZED = (b'{"status":"critical","bot":"not_initialized"}', 503, _HEALTH_HEADERS)
+
+
 @app.route('/health', methods=['GET', 'HEAD'])
-def health():
-    """Comprehensive health check endpoint"""
-    global bot_instance
-    
-    try:
-        if not bot_instance:
-            return jsonify({
-                "status": "critical",
-                "bot": "not_initialized",
-                "timestamp": datetime.now().isoformat()
-            }), 503
-        
-        # Get comprehensive health status
-        health_status = bot_instance.health_monitor.check_health()
-        
-        # Add bot-specific metrics
-        health_status['metrics'].update({
-            'active_users': len(bot_instance.active_sessions),
-            'total_requests': bot_instance.total_requests,
-            'successful_requests': bot_instance.successful_requests,
-            'failed_requests': bot_instance.failed_requests,
-            'success_rate': (bot_instance.successful_requests / max(bot_instance.total_requests, 1)) * 100
-        })
-        
-        # Determine HTTP status code
-        if health_status['status'] == 'critical':
-            status_code = 503
-        elif health_status['status'] == 'degraded':
-            status_code = 200  # Still operational but with warnings
-        else:
-            status_code = 200
-        
-        if request.method == 'HEAD':
-            return "", status_code
-        
-        return jsonify(health_status), status_code
-        
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return jsonify({
-            "status": "error",
-            "error": str(e),
-            "timestamp": datetime.now().isoformat()
-        }), 500
+async def health():
+    """Health check endpoint for Render and uptime monitors"""
+    return _HEALTHY if bot_instance else _NOT_INITIALIZED
 
 
 @app.route('/wake', methods=['GET'])
-def wake():
+async def wake():
     """Fast wake-up endpoint"""
     global bot_instance
 
@@ -1614,21 +1943,75 @@ def wake():
 
 
 @app.route('/ping', methods=['GET', 'HEAD'])
-def ping():
+async def ping():
     """Additional ping endpoint for multiple monitors"""
     return "", 200
 
 
 @app.route('/heartbeat', methods=['GET'])  
-def heartbeat():
+async def heartbeat():
     """Heartbeat endpoint"""
     return {"status": "alive", "timestamp": time.time()}, 200
 
 
+# Compress status pages and JSON reports; webhook acks stay below the threshold
+COMPRESS_MIN_SIZE = 512
+COMPRESS_MIMETYPES = ('text/html', 'application/json')
+
+@app.after_request
+async def compress_response(response):
+    if (response.status_code != 200 or response.mimetype not in COMPRESS_MIMETYPES
+            or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.accept_encodings):
+        return response
+    body = await response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+    response.set_data(gzip.compress(body, 1))  # Level 1: most of the saving for little CPU
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+# Monitoring endpoints reuse expensive results (psutil samples, COUNT queries)
+# for a few seconds; add ?fresh=1 to bypass
+STATUS_CACHE_TTL = 5.0
+_status_cache: Dict[str, tuple] = {}
+
+async def cached(key: str, make, ttl: float = STATUS_CACHE_TTL):
+    """Return make()'s result, reusing it for ttl seconds per key"""
+    now = time.monotonic()
+    hit = _status_cache.get(key)
+    if hit and now - hit[0] < ttl and not request.args.get('fresh'):
+        return hit[1]
+    value = make()
+    if asyncio.iscoroutine(value):
+        value = await value
+    _status_cache[key] = (now, value)
+    return value
+
+async def _database_counts() -> Dict[str, int]:
+    fetch_scalar = bot_instance.db_manager.fetch_scalar
+    return {
+        "user_count": await fetch_scalar("SELECT COUNT(*) FROM users"),
+        "quiz_count": await fetch_scalar("SELECT COUNT(*) FROM quizzes"),
+        "error_count": await fetch_scalar("SELECT COUNT(*) FROM error_logs")
+    }
+
+ANALYTICS_SQL = """SELECT
+    (SELECT COUNT(*) FROM users) as total_users,
+    (SELECT AVG(total_quizzes) FROM users) as avg_quizzes,
+    (SELECT COUNT(*) FROM users WHERE last_seen > datetime('now', '-24 hours')) as recent_users,
+    (SELECT COUNT(*) FROM quizzes WHERE success = 1) as total_quizzes,
+    (SELECT AVG(question_count) FROM quizzes WHERE success = 1) as avg_questions"""
+
+async def _analytics_stats() -> Dict[str, Any]:
+    return (await bot_instance.db_manager.fetch(ANALYTICS_SQL))[0]
+
 @app.route('/debug', methods=['GET'])
-def debug():
+async def debug():
     """Comprehensive debug endpoint"""
-    global bot_instance, bot_config
+    global bot_instance, bot_config_dict
     
     try:
         debug_info = {
@@ -1638,7 +2021,7 @@ def debug():
             "render_external_url": os.environ.get('RENDER_EXTERNAL_URL', 'Not set'),
             "port": os.environ.get('PORT', 'Not set'),
             "active_sessions_count": len(bot_instance.active_sessions) if bot_instance else 0,
-            "config": asdict(bot_config) if bot_config else None,
+            "config": bot_config_dict,
             "timestamp": datetime.now().isoformat()
         }
         
@@ -1649,17 +2032,17 @@ def debug():
                 "failed_requests": bot_instance.failed_requests,
                 "consecutive_errors": bot_instance.consecutive_errors,
                 "auto_recovery_enabled": bot_instance.auto_recovery_enabled,
-                "health_monitor_status": bot_instance.health_monitor.check_health()
+                "health_monitor_status": await cached("health", bot_instance.health_monitor.check_health)
             })
         
         return jsonify(debug_info), 200
         
     except Exception as e:
-        logger.error(f"Debug endpoint error: {e}")
+        logger.error("Debug endpoint error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/metrics', methods=['GET'])
-def metrics():
+async def metrics():
     """Detailed metrics endpoint for monitoring"""
     global bot_instance
     
@@ -1668,7 +2051,7 @@ def metrics():
             return jsonify({"error": "Bot not initialized"}), 503
         
         metrics_data = {
-            "system": bot_instance.health_monitor.get_system_metrics(),
+            "system": await cached("system", bot_instance.health_monitor.get_system_metrics),
             "bot": {
                 "active_sessions": len(bot_instance.active_sessions),
                 "total_requests": bot_instance.total_requests,
@@ -1677,22 +2060,18 @@ def metrics():
                 "success_rate": (bot_instance.successful_requests / max(bot_instance.total_requests, 1)) * 100,
                 "consecutive_errors": bot_instance.consecutive_errors
             },
-            "database": {
-                "user_count": len(bot_instance.db_manager.execute_query("SELECT COUNT(*) as count FROM users")),
-                "quiz_count": len(bot_instance.db_manager.execute_query("SELECT COUNT(*) as count FROM quizzes")),
-                "error_count": len(bot_instance.db_manager.execute_query("SELECT COUNT(*) as count FROM error_logs"))
-            },
+            "database": await cached("database", _database_counts),
             "timestamp": datetime.now().isoformat()
         }
         
         return jsonify(metrics_data), 200
         
     except Exception as e:
-        logger.error(f"Metrics endpoint error: {e}")
+        logger.error("Metrics endpoint error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/analytics', methods=['GET'])
-def analytics():
+async def analytics():
     """Analytics endpoint for user insights"""
     global bot_instance
     
@@ -1701,27 +2080,17 @@ def analytics():
             return jsonify({"error": "Bot not initialized"}), 503
         
         # Get analytics from database
-        user_stats = bot_instance.db_manager.execute_query(
-            "SELECT COUNT(*) as total_users, AVG(total_quizzes) as avg_quizzes FROM users"
-        )[0]
-        
-        quiz_stats = bot_instance.db_manager.execute_query(
-            "SELECT COUNT(*) as total_quizzes, AVG(question_count) as avg_questions FROM quizzes WHERE success = 1"
-        )[0]
-        
-        recent_activity = bot_instance.db_manager.execute_query(
-            "SELECT COUNT(*) as recent_users FROM users WHERE last_seen > datetime('now', '-24 hours')"
-        )[0]
+        stats = await cached("analytics", _analytics_stats)
         
         analytics_data = {
             "users": {
-                "total_users": user_stats['total_users'],
-                "avg_quizzes_per_user": round(user_stats['avg_quizzes'] or 0, 2),
-                "active_last_24h": recent_activity['recent_users']
+                "total_users": stats['total_users'],
+                "avg_quizzes_per_user": round(stats['avg_quizzes'] or 0, 2),
+                "active_last_24h": stats['recent_users']
             },
             "quizzes": {
-                "total_quizzes_created": quiz_stats['total_quizzes'],
-                "avg_questions_per_quiz": round(quiz_stats['avg_questions'] or 0, 2)
+                "total_quizzes_created": stats['total_quizzes'],
+                "avg_questions_per_quiz": round(stats['avg_questions'] or 0, 2)
             },
             "performance": {
                 "success_rate": (bot_instance.successful_requests / max(bot_instance.total_requests, 1)) * 100,
@@ -1733,39 +2102,51 @@ def analytics():
         return jsonify(analytics_data), 200
         
     except Exception as e:
-        logger.error(f"Analytics endpoint error: {e}")
+        logger.error("Analytics endpoint error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/', methods=['GET'])
-def home():
-    """Enhanced home page with comprehensive status"""
-    global bot_instance
-    
-    try:
-        if not bot_instance:
-            status_html = """
+# Home page skeleton; only the status block and timestamp change per request
+HOME_PAGE_TEMPLATE = """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Enhanced Quiz Bot</title>
+            <meta charset="UTF-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            <style>
+                body { font-family: Arial, sans-serif; margin: 40px; background: #fafafa; }
+                .footer { margin-top: 40px; padding: 20px; background: #333; color: white; border-radius: 8px; text-align: center; }
+            </style>
+        </head>
+        <body>
+            %(status_html)s
+            <div class="footer">
+                <p>🚀 <strong>Enhanced Quiz Bot v3.0</strong> - Production Ready & Maintenance Free!</p>
+                <p>Made with ❤️ for creating awesome quizzes!</p>
+                <p>Timestamp: %(timestamp)s</p>
+            </div>
+        </body>
+        </html>
+        """
+
+HOME_NOT_INITIALIZED_HTML = """
             <h1>🎯 Enhanced Quiz Bot - Status</h1>
             <p>❌ Bot: Not Initialized</p>
             <p>🔧 Status: Initializing or Error</p>
             """
-        else:
-            health_status = bot_instance.health_monitor.check_health()
-            metrics = health_status['metrics']
-            
-            status_emoji = "✅" if health_status['status'] == 'healthy' else "⚠️" if health_status['status'] == 'degraded' else "❌"
-            
-            status_html = f"""
+
+HOME_STATUS_TEMPLATE = """
             <h1>🎯 Enhanced Quiz Bot v3.0 - Production Ready!</h1>
             <div style="background: #f0f0f0; padding: 20px; border-radius: 10px; margin: 20px 0;">
-                <h2>📊 System Status: {status_emoji} {health_status['status'].title()}</h2>
+                <h2>📊 System Status: %(emoji)s %(status)s</h2>
                 <p><strong>🤖 Bot Status:</strong> ✅ Ready & Connected</p>
-                <p><strong>👥 Active Users:</strong> {len(bot_instance.active_sessions)}</p>
-                <p><strong>📈 Total Requests:</strong> {bot_instance.total_requests}</p>
-                <p><strong>✅ Success Rate:</strong> {(bot_instance.successful_requests / max(bot_instance.total_requests, 1)) * 100:.1f}%</p>
-                <p><strong>⏱️ Uptime:</strong> {metrics['uptime_seconds'] / 3600:.1f} hours</p>
-                <p><strong>💾 Memory Usage:</strong> {metrics['memory_usage_mb']:.1f} MB</p>
-                <p><strong>🖥️ CPU Usage:</strong> {metrics['cpu_usage_percent']:.1f}%</p>
+                <p><strong>👥 Active Users:</strong> %(active_users)d</p>
+                <p><strong>📈 Total Requests:</strong> %(total_requests)d</p>
+                <p><strong>✅ Success Rate:</strong> %(success_rate).1f%%</p>
+                <p><strong>⏱️ Uptime:</strong> %(uptime_hours).1f hours</p>
+                <p><strong>💾 Memory Usage:</strong> %(memory_mb).1f MB</p>
+                <p><strong>🖥️ CPU Usage:</strong> %(cpu_percent).1f%%</p>
             </div>
             
             <div style="background: #e8f4f8; padding: 15px; border-radius: 8px; margin: 20px 0;">
@@ -1790,29 +2171,36 @@ def home():
                 <p><a href="/analytics">/analytics</a> - User analytics</p>
             </div>
             """
-        
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Enhanced Quiz Bot</title>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 40px; background: #fafafa; }}
-                .footer {{ margin-top: 40px; padding: 20px; background: #333; color: white; border-radius: 8px; text-align: center; }}
-            </style>
-        </head>
-        <body>
-            {status_html}
-            <div class="footer">
-                <p>🚀 <strong>Enhanced Quiz Bot v3.0</strong> - Production Ready & Maintenance Free!</p>
-                <p>Made with ❤️ for creating awesome quizzes!</p>
-                <p>Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
-            </div>
-        </body>
-        </html>
-        """
+
+HEALTH_STATUS_EMOJI = {'healthy': "✅", 'degraded': "⚠️", 'critical': "❌"}
+
+@app.route('/', methods=['GET'])
+async def home():
+    """Enhanced home page with comprehensive status"""
+    global bot_instance
+    
+    try:
+        if not bot_instance:
+            status_html = HOME_NOT_INITIALIZED_HTML
+        else:
+            health_status = await cached("health", bot_instance.health_monitor.check_health)
+            metrics = health_status['metrics']
+            
+            status_html = HOME_STATUS_TEMPLATE % {
+                'emoji': HEALTH_STATUS_EMOJI[health_status['status']],
+                'status': health_status['status'].title(),
+                'active_users': len(bot_instance.active_sessions),
+                'total_requests': bot_instance.total_requests,
+                'success_rate': (bot_instance.successful_requests / max(bot_instance.total_requests, 1)) * 100,
+                'uptime_hours': metrics['uptime_seconds'] / 3600,
+                'memory_mb': metrics['memory_usage_mb'],
+                'cpu_percent': metrics['cpu_usage_percent'],
+            }
+        
+        return HOME_PAGE_TEMPLATE % {
+            'status_html': status_html,
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC'),
+        }
         
     except Exception as e:
         return f"""
@@ -1822,68 +2210,6 @@ def home():
         """, 500
 
 
-def setup_signal_handlers():
-    """Setup graceful shutdown handlers"""
-    def signal_handler(signum, frame):
-        logger.info(f"Received signal {signum}, initiating graceful shutdown...")
-        
-        global bot_instance
-        if bot_instance:
-            try:
-                # Save all active sessions
-                for user_id, session in bot_instance.active_sessions.items():
-                    bot_instance._save_user_session_to_db(session)
-                
-                # Create final database backup
-                bot_instance.db_manager.backup_database()
-                
-                logger.info("Graceful shutdown completed")
-            except Exception as e:
-                logger.error(f"Error during graceful shutdown: {e}")
-        
-        sys.exit(0)
-    
-    # Register signal handlers
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    logger.info("Signal handlers registered for graceful shutdown")
-
-def enhanced_keep_alive():
-    """Multi-endpoint keep-alive for better performance"""
-    def ping():
-        endpoints = ['/health', '/wake', '/ping', '/heartbeat']
-        while True:
-            try:
-                # Smart keep-alive: every 5 minutes with rotation
-                time.sleep(5 * 60)
-                
-                port = os.environ.get('PORT', '10000')
-                endpoint = random.choice(endpoints)
-                
-                response = requests.get(
-                    f'http://localhost:{port}{endpoint}',
-                    timeout=3,
-                    headers={'User-Agent': 'EnhancedKeepAlive-Bot/3.0'}
-                )
-                
-                if response.status_code == 200:
-                    logger.info(f"🔄 Keep-alive ping {endpoint} successful")
-                else:
-                    logger.warning(f"⚠️ Keep-alive ping {endpoint} failed: {response.status_code}")
-
-            except Exception as e:
-                logger.warning(f"❌ Keep-alive error: {type(e).__name__}")
-                pass
-
-    thread = threading.Thread(target=ping, daemon=True)
-    thread.start()
-    logger.info("🛡️ Enhanced keep-alive protection started")
-
-
-# Initialize enhanced systems
-setup_signal_handlers()
-enhanced_keep_alive()
-
 def main():
     """Enhanced main function with comprehensive startup"""
     try:
@@ -1891,21 +2217,22 @@ def main():
         logger.info("🚀 Starting Enhanced Quiz Bot Server...")
         
         # Log startup information
-        logger.info(f"📍 Port: {port}")
-        logger.info(f"🔗 Webhook URL: {os.environ.get('RENDER_EXTERNAL_URL', 'Not set')}/webhook")
-        logger.info(f"🤖 Bot Status: {'Ready' if bot_instance else 'Not Ready'}")
-        
-        # Start Flask server with enhanced configuration
-        app.run(
-            host='0.0.0.0', 
-            port=port, 
-            debug=False,
-            threaded=True,
-            use_reloader=False  # Disable reloader for production
+        logger.info("📍 Port: %s", port)
+        logger.info("🔗 Webhook URL: %s/webhook", os.environ.get('RENDER_EXTERNAL_URL', 'Not set'))
+        
+        # Start ASGI server (uvloop + httptools)
+        import uvicorn
+        uvicorn.run(
+            app,
+            host='0.0.0.0',
+            port=port,
+            loop='uvloop',
+            http='httptools',
+            workers=1
         )
         
     except Exception as e:
-        logger.error(f"❌ Server startup failed: {e}")
+        logger.error("❌ Server startup failed: %s", e)
         sys.exit(1)
 
 if __name__ == "__main__":